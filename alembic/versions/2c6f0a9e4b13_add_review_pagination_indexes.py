@@ -0,0 +1,28 @@
+"""add review pagination indexes
+
+Revision ID: 2c6f0a9e4b13
+Revises: 7b3e9d1c5a28
+Create Date: 2026-10-19 17:12:40.331852
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c6f0a9e4b13'
+down_revision: Union[str, None] = '7b3e9d1c5a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reviews_product_id_created_at_id', 'reviews', ['product_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_reviews_product_id_rating_id', 'reviews', ['product_id', 'rating', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reviews_product_id_rating_id', table_name='reviews')
+    op.drop_index('ix_reviews_product_id_created_at_id', table_name='reviews')
@@ -0,0 +1,55 @@
+"""add promotions and tax_rates tables
+
+Revision ID: 3b7c1e9a4d52
+Revises: 8bd98d362c10
+Create Date: 2026-10-19 09:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7c1e9a4d52'
+down_revision: Union[str, None] = '8bd98d362c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('promotions',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('kind', sa.Enum('coupon', 'tiered', 'bundle', name='promotion_kinds'), nullable=False),
+    sa.Column('coupon_code', sa.String(), nullable=True),
+    sa.Column('discount_percentage', sa.Float(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('min_quantity', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('min_subtotal', sa.Float(), server_default='0', nullable=False),
+    sa.Column('bundle_product_ids', postgresql.ARRAY(sa.Integer()), nullable=True),
+    sa.Column('is_active', sa.Boolean(), server_default='True', nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('coupon_code'),
+    sa.UniqueConstraint('id')
+    )
+    op.create_table('tax_rates',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('region', sa.String(), nullable=False),
+    sa.Column('rate', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id'),
+    sa.UniqueConstraint('region')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('tax_rates')
+    op.drop_table('promotions')
+    sa.Enum(name='promotion_kinds').drop(op.get_bind(), checkfirst=True)
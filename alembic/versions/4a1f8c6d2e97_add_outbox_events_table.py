@@ -0,0 +1,37 @@
+"""add outbox events table
+
+Revision ID: 4a1f8c6d2e97
+Revises: d3e7a5b80f26
+Create Date: 2026-10-19 15:41:07.215930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a1f8c6d2e97'
+down_revision: Union[str, None] = 'd3e7a5b80f26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('topics', postgresql.ARRAY(sa.String()), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id')
+    )
+    op.create_index('ix_outbox_events_created_at', 'outbox_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_created_at', table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,28 @@
+"""add cart lookup indexes
+
+Revision ID: 5e0b7c3a9d21
+Revises: 8e5d2b7f0c46
+Create Date: 2026-10-19 18:02:19.480137
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b7c3a9d21'
+down_revision: Union[str, None] = '8e5d2b7f0c46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_carts_user_id', 'carts', ['user_id'], unique=False)
+    op.create_index('ix_cart_items_cart_id_product_id', 'cart_items', ['cart_id', 'product_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cart_items_cart_id_product_id', table_name='cart_items')
+    op.drop_index('ix_carts_user_id', table_name='carts')
@@ -0,0 +1,32 @@
+"""add catalog updated_at
+
+Revision ID: 6d2e8b4f1a93
+Revises: a7d3f1c9e284
+Create Date: 2026-10-19 20:31:46.270183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d2e8b4f1a93'
+down_revision: Union[str, None] = 'a7d3f1c9e284'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False))
+    op.add_column('categories', sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False))
+    op.create_index('ix_products_updated_at', 'products', ['updated_at'], unique=False)
+    op.create_index('ix_categories_updated_at', 'categories', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_categories_updated_at', table_name='categories')
+    op.drop_index('ix_products_updated_at', table_name='products')
+    op.drop_column('categories', 'updated_at')
+    op.drop_column('products', 'updated_at')
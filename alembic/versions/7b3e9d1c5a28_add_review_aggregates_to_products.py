@@ -0,0 +1,65 @@
+"""add review aggregates to products
+
+Revision ID: 7b3e9d1c5a28
+Revises: 4a1f8c6d2e97
+Create Date: 2026-10-19 16:47:12.508361
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e9d1c5a28'
+down_revision: Union[str, None] = '4a1f8c6d2e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_1_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_2_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_3_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_4_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_5_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute("""
+        UPDATE products SET
+            review_count = aggregates.review_count,
+            rating_sum = aggregates.rating_sum,
+            average_rating = aggregates.rating_sum::float / aggregates.review_count,
+            rating_1_count = aggregates.rating_1_count,
+            rating_2_count = aggregates.rating_2_count,
+            rating_3_count = aggregates.rating_3_count,
+            rating_4_count = aggregates.rating_4_count,
+            rating_5_count = aggregates.rating_5_count
+        FROM (
+            SELECT product_id,
+                   count(*) AS review_count,
+                   sum(rating) AS rating_sum,
+                   count(*) FILTER (WHERE rating = 1) AS rating_1_count,
+                   count(*) FILTER (WHERE rating = 2) AS rating_2_count,
+                   count(*) FILTER (WHERE rating = 3) AS rating_3_count,
+                   count(*) FILTER (WHERE rating = 4) AS rating_4_count,
+                   count(*) FILTER (WHERE rating = 5) AS rating_5_count
+            FROM reviews
+            WHERE rating IS NOT NULL
+            GROUP BY product_id
+        ) AS aggregates
+        WHERE products.id = aggregates.product_id
+    """)
+    op.execute("UPDATE products SET review_count = 0 WHERE review_count IS NULL")
+    op.alter_column('products', 'review_count', existing_type=sa.Integer(), server_default='0', nullable=False)
+
+
+def downgrade() -> None:
+    op.alter_column('products', 'review_count', existing_type=sa.Integer(), server_default=None, nullable=True)
+    op.drop_column('products', 'rating_5_count')
+    op.drop_column('products', 'rating_4_count')
+    op.drop_column('products', 'rating_3_count')
+    op.drop_column('products', 'rating_2_count')
+    op.drop_column('products', 'rating_1_count')
+    op.drop_column('products', 'rating_sum')
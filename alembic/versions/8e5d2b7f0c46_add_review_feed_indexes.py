@@ -0,0 +1,28 @@
+"""add review feed indexes
+
+Revision ID: 8e5d2b7f0c46
+Revises: 2c6f0a9e4b13
+Create Date: 2026-10-19 17:38:05.664217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e5d2b7f0c46'
+down_revision: Union[str, None] = '2c6f0a9e4b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reviews_created_at_id', 'reviews', ['created_at', 'id'], unique=False)
+    op.create_index('ix_reviews_user_id_created_at_id', 'reviews', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reviews_user_id_created_at_id', table_name='reviews')
+    op.drop_index('ix_reviews_created_at_id', table_name='reviews')
@@ -0,0 +1,41 @@
+"""add category tree
+
+Revision ID: a7d3f1c9e284
+Revises: f2b9c7d4e813
+Create Date: 2026-10-19 19:42:18.905316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3f1c9e284'
+down_revision: Union[str, None] = 'f2b9c7d4e813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('categories', sa.Column('parent_id', sa.Integer(), nullable=True))
+    op.add_column('categories', sa.Column('path', sa.String(), nullable=True))
+    op.create_foreign_key('categories_parent_id_fkey', 'categories', 'categories', ['parent_id'], ['id'], ondelete='RESTRICT')
+
+    # Existing categories become roots
+    op.execute("UPDATE categories SET path = id || '/'")
+    op.alter_column('categories', 'path', existing_type=sa.String(), nullable=False)
+
+    op.create_index('ix_categories_path', 'categories', ['path'], unique=False, postgresql_ops={'path': 'varchar_pattern_ops'})
+    op.create_index('ix_categories_parent_id', 'categories', ['parent_id'], unique=False)
+    op.create_index('ix_products_category_id', 'products', ['category_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_category_id', table_name='products')
+    op.drop_index('ix_categories_parent_id', table_name='categories')
+    op.drop_index('ix_categories_path', table_name='categories')
+    op.drop_constraint('categories_parent_id_fkey', 'categories', type_='foreignkey')
+    op.drop_column('categories', 'path')
+    op.drop_column('categories', 'parent_id')
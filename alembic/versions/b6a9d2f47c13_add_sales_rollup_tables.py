@@ -0,0 +1,49 @@
+"""add sales rollup tables
+
+Revision ID: b6a9d2f47c13
+Revises: 5f8e3c1b9a64
+Create Date: 2026-10-19 13:41:08.602954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6a9d2f47c13'
+down_revision: Union[str, None] = '5f8e3c1b9a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('items_sold', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('revenue', sa.Float(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('sales_daily_products',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('quantity', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('revenue', sa.Float(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    op.create_table('sales_daily_categories',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('revenue', sa.Float(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('day', 'category_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sales_daily_categories')
+    op.drop_table('sales_daily_products')
+    op.drop_table('sales_daily')
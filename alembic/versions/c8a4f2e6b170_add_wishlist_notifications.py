@@ -0,0 +1,42 @@
+"""add wishlist notifications
+
+Revision ID: c8a4f2e6b170
+Revises: 5e0b7c3a9d21
+Create Date: 2026-10-19 18:31:44.902615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8a4f2e6b170'
+down_revision: Union[str, None] = '5e0b7c3a9d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('wishlist_notifications',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.Enum('back_in_stock', 'price_drop', name='wishlist_notification_kinds'), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id')
+    )
+    op.create_index('ix_wishlist_notifications_user_id_id', 'wishlist_notifications', ['user_id', 'id'], unique=False)
+    op.create_index('ix_wishlist_items_product_id', 'wishlist_items', ['product_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_wishlist_items_product_id', table_name='wishlist_items')
+    op.drop_index('ix_wishlist_notifications_user_id_id', table_name='wishlist_notifications')
+    op.drop_table('wishlist_notifications')
+    sa.Enum(name='wishlist_notification_kinds').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,176 @@
+"""partition orders and order_items by month, add orders_archive
+
+Revision ID: d3e7a5b80f26
+Revises: b6a9d2f47c13
+Create Date: 2026-10-19 14:52:31.079514
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3e7a5b80f26'
+down_revision: Union[str, None] = 'b6a9d2f47c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MONTHS_AHEAD = 3
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_month_partitions(first_month: date, last_month: date) -> None:
+    month = first_month
+    while month <= last_month:
+        suffix = month.strftime("%Y_%m")
+        # UTC like the months themselves, a bare date would be read in the session's TimeZone
+        bounds = f"FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+        op.execute(f"CREATE TABLE orders_p{suffix} PARTITION OF orders FOR VALUES {bounds}")
+        op.execute(f"CREATE TABLE order_items_p{suffix} PARTITION OF order_items FOR VALUES {bounds}")
+        month = add_months(month, 1)
+
+
+def upgrade() -> None:
+    # Keep the id sequences alive when the old tables are dropped
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY NONE")
+
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_status_created_at_id', table_name='orders')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.rename_table('orders', 'orders_unpartitioned')
+    op.rename_table('order_items', 'order_items_unpartitioned')
+    op.execute("ALTER TABLE orders_unpartitioned RENAME CONSTRAINT orders_pkey TO orders_unpartitioned_pkey")
+    op.execute("ALTER TABLE order_items_unpartitioned RENAME CONSTRAINT order_items_pkey TO order_items_unpartitioned_pkey")
+
+    op.create_table('orders',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('orders_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.String(), server_default='pending', nullable=False),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('payment_method', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('order_items_id_seq')"), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('order_created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('subtotal', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id', 'order_created_at'], ['orders.id', 'orders.created_at'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'order_created_at'),
+    postgresql_partition_by='RANGE (order_created_at)'
+    )
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_user_id_created_at_id', 'orders', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_status_created_at_id', 'orders', ['status', 'created_at', 'id'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+    # One partition per month from the oldest order up to a few months ahead, plus a default catch-all
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM orders_unpartitioned")).scalar()
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    first_month = oldest.astimezone(timezone.utc).date().replace(day=1) if oldest else this_month
+    create_month_partitions(min(first_month, this_month), add_months(this_month, MONTHS_AHEAD))
+    op.execute("CREATE TABLE orders_default PARTITION OF orders DEFAULT")
+    op.execute("CREATE TABLE order_items_default PARTITION OF order_items DEFAULT")
+
+    op.execute("""
+        INSERT INTO orders (id, user_id, created_at, total_amount, status, address, payment_method)
+        SELECT id, user_id, created_at, total_amount, status, address, payment_method FROM orders_unpartitioned
+    """)
+    op.execute("""
+        INSERT INTO order_items (id, order_id, order_created_at, product_id, quantity, subtotal)
+        SELECT oi.id, oi.order_id, o.created_at, oi.product_id, oi.quantity, oi.subtotal
+        FROM order_items_unpartitioned oi JOIN orders_unpartitioned o ON o.id = oi.order_id
+    """)
+    op.drop_table('order_items_unpartitioned')
+    op.drop_table('orders_unpartitioned')
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id")
+
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('payment_method', sa.String(), nullable=True),
+    sa.Column('order_items', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('archived_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_orders_archive_user_id'), 'orders_archive', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_orders_archive_user_id'), table_name='orders_archive')
+    op.drop_table('orders_archive')
+
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY NONE")
+    op.rename_table('orders', 'orders_partitioned')
+    op.rename_table('order_items', 'order_items_partitioned')
+    op.execute("ALTER INDEX ix_orders_created_at_id RENAME TO ix_orders_partitioned_created_at_id")
+    op.execute("ALTER INDEX ix_orders_user_id_created_at_id RENAME TO ix_orders_partitioned_user_id_created_at_id")
+    op.execute("ALTER INDEX ix_orders_status_created_at_id RENAME TO ix_orders_partitioned_status_created_at_id")
+    op.execute("ALTER INDEX ix_order_items_order_id RENAME TO ix_order_items_partitioned_order_id")
+    op.execute("ALTER TABLE orders_partitioned RENAME CONSTRAINT orders_pkey TO orders_partitioned_pkey")
+    op.execute("ALTER TABLE order_items_partitioned RENAME CONSTRAINT order_items_pkey TO order_items_partitioned_pkey")
+
+    op.create_table('orders',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('orders_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.String(), server_default='pending', nullable=False),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('payment_method', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id')
+    )
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('order_items_id_seq')"), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('subtotal', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id')
+    )
+    op.execute("""
+        INSERT INTO orders (id, user_id, created_at, total_amount, status, address, payment_method)
+        SELECT id, user_id, created_at, total_amount, status, address, payment_method FROM orders_partitioned
+    """)
+    op.execute("""
+        INSERT INTO order_items (id, order_id, product_id, quantity, subtotal)
+        SELECT id, order_id, product_id, quantity, subtotal FROM order_items_partitioned
+    """)
+    op.execute("DROP TABLE order_items_partitioned CASCADE")
+    op.execute("DROP TABLE orders_partitioned CASCADE")
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id")
+
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_user_id_created_at_id', 'orders', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_status_created_at_id', 'orders', ['status', 'created_at', 'id'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
@@ -0,0 +1,27 @@
+"""add category name trigram index
+
+Revision ID: f2b9c7d4e813
+Revises: c8a4f2e6b170
+Create Date: 2026-10-19 19:05:27.117384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9c7d4e813'
+down_revision: Union[str, None] = 'c8a4f2e6b170'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_categories_name_trgm', 'categories', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_categories_name_trgm', table_name='categories', postgresql_using='gin')
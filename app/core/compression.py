@@ -0,0 +1,206 @@
+from threading import Lock
+import gzip
+import hashlib
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.utils.conditional import weak_etag
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+
+# Only text formats shrink enough to be worth it, images and uploads are already compressed.
+# Server-Sent Events are passed through as they are. Streamed NDJSON is compressed and flushed chunk by chunk.
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+# Precompressed bodies are compressed once per cache entry, so they can afford the slowest levels
+PRECOMPRESSED_GZIP_LEVEL = 9
+PRECOMPRESSED_BROTLI_QUALITY = 11
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Pick br or gzip from an Accept-Encoding header, None when neither is acceptable."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_weight = None, 0.0
+    for encoding in candidates:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str, precompressed: bool = False) -> bytes:
+    if encoding == "br":
+        quality = PRECOMPRESSED_BROTLI_QUALITY if precompressed else settings.compression_brotli_quality
+        return brotli.compress(body, quality=quality)
+    level = PRECOMPRESSED_GZIP_LEVEL if precompressed else settings.compression_gzip_level
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class StreamCompressor:
+    """Compresses a streamed body and flushes after every chunk, so each chunk reaches the client
+    as soon as it is sent (NDJSON progress lines) rather than when the stream ends."""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.compression_brotli_quality)
+        else:
+            # wbits=31 writes the gzip header and trailer around the deflate stream
+            self._compressor = zlib.compressobj(settings.compression_gzip_level, zlib.DEFLATED, 31)
+        self._brotli = encoding == "br"
+
+    def process(self, chunk: bytes) -> bytes:
+        if self._brotli:
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli:
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def is_compressible(content_type: str | None) -> bool:
+    return bool(content_type) and content_type.split(";")[0].strip().lower() in COMPRESSIBLE_TYPES
+
+
+class CompressibleBody:
+    """Rendered response bytes plus their compressed variants, kept together in a cache entry
+    so a hot response is compressed once rather than on every hit."""
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.etag = weak_etag(hashlib.sha1(body).hexdigest())
+        self._encoded = {}
+        self._lock = Lock()
+
+    def encode(self, encoding: str) -> bytes:
+        encoded = self._encoded.get(encoding)
+        if encoded is None:
+            with self._lock:
+                encoded = self._encoded.get(encoding)
+                if encoded is None:
+                    encoded = self._encoded[encoding] = compress(self.body, encoding, precompressed=True)
+        return encoded
+
+
+class PrecompressedResponse(Response):
+    """Serves a CompressibleBody in the encoding the client accepts. CompressionMiddleware
+    leaves it alone because it already carries its Content-Encoding."""
+
+    def __init__(self, body: CompressibleBody, status_code: int = 200, headers: dict | None = None):
+        super().__init__(body.body, status_code=status_code, headers=headers, media_type=body.media_type)
+        self.compressible = body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if len(self.compressible.body) >= settings.compression_min_size:
+            self.headers.add_vary_header("Accept-Encoding")
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+            if encoding:
+                self.body = self.compressible.encode(encoding)
+                self.headers["Content-Encoding"] = encoding
+                self.headers["Content-Length"] = str(len(self.body))
+        await super().__call__(scope, receive, send)
+
+
+class CompressionMiddleware:
+    """gzip / Brotli for responses of an allowed content type above the size threshold.
+
+    The threshold is checked against the Content-Length, so small responses go out as they are.
+    Bodies sent in several chunks, including every response passing through a
+    BaseHTTPMiddleware, are compressed incrementally. A stream of unknown length is compressed
+    from its first chunk and flushed after each one, so nothing waits for more data."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = settings.compression_min_size if minimum_size is None else minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether the response is worth compressing
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is not None:
+                chunk = compressor.process(body)
+                if not more_body:
+                    chunk += compressor.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            if not is_compressible(headers.get("content-type")) or "content-encoding" in headers or start["status"] in (204, 304):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            length = headers.get("content-length")
+            size = int(length) if length is not None else None if more_body else len(body)
+            if size is not None and size < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            if more_body:
+                compressor = StreamCompressor(encoding)
+                del headers["Content-Length"]
+                await send(start)
+                await send({"type": "http.response.body", "body": compressor.process(body), "more_body": True})
+            else:
+                body = compress(body, encoding)
+                headers["Content-Length"] = str(len(body))
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -10,6 +10,60 @@ class Settings(BaseSettings):
     algorithm: str
     access_token_expire_minutes: int
 
+    # Pricing Config
+    default_tax_rate: float = 0.10
+    pricing_cache_ttl_seconds: int = 60
+
+    # Catalog & Guest Cart Config
+    catalog_cache_ttl_seconds: int = 30
+    catalog_version_ttl_seconds: float = 2.0
+    guest_cart_expire_days: int = 30
+
+    # User Profile Config
+    profile_cache_ttl_seconds: int = 15
+
+    # Idempotency Config
+    idempotency_backend: str = "database"
+    idempotency_ttl_hours: int = 24
+    idempotency_wait_seconds: float = 10.0
+
+    # Job Queue Config
+    job_batch_size: int = 10
+    job_poll_interval_seconds: float = 1.0
+    job_visibility_timeout_seconds: int = 300
+
+    # Order Partition Config
+    order_partition_months_ahead: int = 3
+
+    # Live Events Config
+    event_poll_interval_seconds: float = 0.5
+    event_retention_minutes: int = 60
+    event_snapshot_limit: int = 50
+
+    # Wishlist Notification Config
+    notification_sink: str = "file"
+    notification_file_path: str = "notifications.ndjson"
+    smtp_host: str = "localhost"
+    smtp_port: int = 1025
+    smtp_sender: str = "no-reply@localhost"
+    notification_chunk_size: int = 1000
+    notification_digest_delay_seconds: int = 60
+
+    # Compression Config
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 5
+
+    # Server Config (gunicorn.conf.py), unset values are derived from the CPUs available
+    web_bind: str = "0.0.0.0:8000"
+    web_worker_class: str = "uvicorn.workers.UvicornWorker"
+    web_workers: int | None = None
+    web_keepalive_seconds: int = 5
+    web_timeout_seconds: int = 60
+    web_max_requests: int = 1000
+    web_max_requests_jitter: int | None = None
+    web_backlog: int | None = None
+
     class Config:
         env_file = ".env"
 
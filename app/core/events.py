@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import time
+from starlette.requests import Request
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.services.events import EventService
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    max_pending = 1000
+
+    def __init__(self, topics: set[str]):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(self.max_pending)
+        # Set when the subscriber fell too far behind, it must reconnect and replay with Last-Event-ID
+        self.overflowed = False
+
+
+class EventBroker:
+    """Tails the outbox table and fans new events out to the subscribers of this process.
+
+    One poller per process reads the outbox no matter how many clients are connected, so
+    live clients cost a queue each instead of a polling request every few seconds."""
+
+    batch_size = 500
+    # Outbox ids are assigned before commit, so a lower id can show up after a higher one.
+    # Delivery stops at a gap until it is filled or older than this.
+    gap_timeout_seconds = 2.0
+    purge_interval_seconds = 300
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self.last_id: int | None = None
+        self._subscriptions: dict[str, set[Subscription]] = {}
+        self._task: asyncio.Task | None = None
+        self._gap_since: float | None = None
+        self._purged_at = 0.0
+
+    async def subscribe(self, topics: set[str]) -> Subscription:
+        if self._task is None or self._task.done():
+            if self.last_id is None:
+                self.last_id = await run_in_threadpool(self._fetch_latest_id)
+            self._task = asyncio.create_task(self._run())
+        subscription = Subscription(topics)
+        for topic in topics:
+            self._subscriptions.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            subscribers = self._subscriptions.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[topic]
+
+    async def _run(self):
+        while self._subscriptions:
+            try:
+                events = await run_in_threadpool(self._fetch, self.last_id)
+                self._dispatch(events)
+            except Exception:
+                logger.exception("Failed to read the event outbox")
+            await asyncio.sleep(self.poll_interval)
+        self._task = None
+
+    def _dispatch(self, events):
+        now = time.monotonic()
+        for event in events:
+            if event.id != self.last_id + 1:
+                self._gap_since = self._gap_since or now
+                if now - self._gap_since < self.gap_timeout_seconds:
+                    return
+            self._gap_since = None
+            self.last_id = event.id
+
+            delivered = set()
+            for topic in event.topics:
+                for subscription in self._subscriptions.get(topic, ()):
+                    if subscription in delivered:
+                        continue
+                    delivered.add(subscription)
+                    try:
+                        subscription.queue.put_nowait(event)
+                    except asyncio.QueueFull:
+                        subscription.overflowed = True
+
+    @staticmethod
+    def _fetch_latest_id() -> int:
+        with SessionLocal() as db:
+            return EventService.get_latest_id(db)
+
+    def _fetch(self, after_id: int):
+        with SessionLocal() as db:
+            if time.monotonic() - self._purged_at > self.purge_interval_seconds:
+                self._purged_at = time.monotonic()
+                EventService.purge(db)
+            events = EventService.get_events_after(db, after_id, self.batch_size)
+            db.expunge_all()
+            return events
+
+
+event_broker = EventBroker(settings.event_poll_interval_seconds)
+
+
+def format_event(kind: str, data, event_id: int | None = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {kind}", f"data: {json.dumps(data, default=str)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def _load_snapshots(topics: set[str]):
+    with SessionLocal() as db:
+        return {topic: EventService.get_snapshot(db, topic) for topic in sorted(topics)}
+
+
+# Events a reconnecting client missed, or None when they were already purged and it needs a snapshot
+def _load_replay(topics: set[str], after_id: int):
+    with SessionLocal() as db:
+        oldest_id = EventService.get_oldest_id(db)
+        if oldest_id is not None and oldest_id > after_id + 1:
+            return None
+        events = EventService.get_events_after(db, after_id, EventBroker.batch_size * 10, sorted(topics))
+        db.expunge_all()
+        return events
+
+
+async def stream_events(request: Request, topics: set[str], last_event_id: int | None, keepalive_seconds: float = 15.0):
+    """Server-Sent Events for the given topics: a snapshot per topic (or the missed events when
+    resuming with Last-Event-ID), then one message per outbox event."""
+    subscription = await event_broker.subscribe(topics)
+    sent_id = event_broker.last_id
+    try:
+        replay = None
+        if last_event_id is not None:
+            replay = await run_in_threadpool(_load_replay, topics, last_event_id)
+        if replay is None:
+            snapshots = await run_in_threadpool(_load_snapshots, topics)
+            for topic, snapshot in snapshots.items():
+                yield format_event("snapshot", {"topic": topic, "data": snapshot}, sent_id)
+        else:
+            for event in replay:
+                yield format_event(event.kind, event.payload, event.id)
+            if replay:
+                sent_id = max(sent_id, replay[-1].id)
+
+        while not subscription.overflowed:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), keepalive_seconds)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            if event.id <= sent_id:
+                continue
+            sent_id = event.id
+            yield format_event(event.kind, event.payload, event.id)
+        # Too far behind, the client reconnects with Last-Event-ID and catches up from the outbox
+        yield format_event("reconnect", {"last_event_id": sent_id})
+    finally:
+        event_broker.unsubscribe(subscription)
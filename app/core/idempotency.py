@@ -0,0 +1,215 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock
+import hashlib
+import time
+from fastapi import status
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.models import IdempotencyKey
+
+
+# Mutating endpoints that honour the Idempotency-Key header
+IDEMPOTENT_ROUTES = {
+    ("POST", "/orders"),
+    ("POST", "/carts"),
+    ("POST", "/reviews"),
+    ("POST", "/auth/signup"),
+}
+
+
+@dataclass
+class StoredResponse:
+    request_hash: str
+    status_code: int | None = None
+    content_type: str | None = None
+    body: bytes | None = None
+
+
+class IdempotencyConflict(Exception):
+    def __init__(self, status_code: int, detail: str):
+        self.status_code = status_code
+        self.detail = detail
+
+
+class IdempotencyStore(ABC):
+    """Shared interface of the idempotency backends.
+
+    `begin` returns None when the caller owns the key and must run the request, or the stored
+    response of the first request, waiting for it if it is still running."""
+
+    @abstractmethod
+    def begin(self, key: str, request_hash: str) -> StoredResponse | None:
+        ...
+
+    @abstractmethod
+    def complete(self, key: str, status_code: int, content_type: str | None, body: bytes):
+        ...
+
+    @abstractmethod
+    def release(self, key: str):
+        ...
+
+    @staticmethod
+    def check_hash(stored: StoredResponse, request_hash: str):
+        if stored.request_hash != request_hash:
+            raise IdempotencyConflict(
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                "Idempotency-Key was already used with a different request")
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    def __init__(self, ttl_seconds: float, wait_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self._entries: dict[str, tuple[float, StoredResponse, Event]] = {}
+        self._lock = Lock()
+
+    def begin(self, key, request_hash):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                self._entries[key] = (now + self.ttl_seconds, StoredResponse(request_hash), Event())
+                return None
+        _, stored, done = entry
+        self.check_hash(stored, request_hash)
+        if not done.wait(self.wait_seconds):
+            raise IdempotencyConflict(status.HTTP_409_CONFLICT, "A request with this Idempotency-Key is still in progress")
+        if stored.status_code is None:
+            # The first request failed and released the key, run this one instead
+            return self.begin(key, request_hash)
+        return stored
+
+    def complete(self, key, status_code, content_type, body):
+        with self._lock:
+            _, stored, done = self._entries[key]
+            stored.status_code, stored.content_type, stored.body = status_code, content_type, body
+        done.set()
+
+    def release(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry:
+            entry[2].set()
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    poll_interval = 0.1
+    cleanup_interval = 300
+
+    def __init__(self, ttl_seconds: float, wait_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self._last_cleanup = 0.0
+
+    def begin(self, key, request_hash):
+        deadline = time.monotonic() + self.wait_seconds
+        with SessionLocal() as db:
+            self._cleanup(db)
+            while True:
+                now = datetime.now(timezone.utc)
+                claimed = db.execute(
+                    insert(IdempotencyKey)
+                    .values(key=key, request_hash=request_hash, expires_at=now + timedelta(seconds=self.ttl_seconds))
+                    .on_conflict_do_nothing()
+                    .returning(IdempotencyKey.key)
+                ).first()
+                db.commit()
+                if claimed:
+                    return None
+
+                record = db.execute(select(IdempotencyKey).where(IdempotencyKey.key == key)).scalar_one_or_none()
+                if record is not None:
+                    if record.expires_at < now:
+                        db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+                        db.commit()
+                        continue
+                    stored = StoredResponse(record.request_hash, record.status_code, record.content_type, record.response_body)
+                    self.check_hash(stored, request_hash)
+                    if stored.status_code is not None:
+                        return stored
+                db.rollback()
+
+                if time.monotonic() > deadline:
+                    raise IdempotencyConflict(status.HTTP_409_CONFLICT, "A request with this Idempotency-Key is still in progress")
+                time.sleep(self.poll_interval)
+
+    def complete(self, key, status_code, content_type, body):
+        with SessionLocal() as db:
+            record = db.get(IdempotencyKey, key)
+            if record is not None:
+                record.status_code = status_code
+                record.content_type = content_type
+                record.response_body = body
+                db.commit()
+
+    def release(self, key):
+        with SessionLocal() as db:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+            db.commit()
+
+    def _cleanup(self, db):
+        if time.monotonic() - self._last_cleanup < self.cleanup_interval:
+            return
+        self._last_cleanup = time.monotonic()
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.now(timezone.utc)))
+        db.commit()
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    ttl_seconds = settings.idempotency_ttl_hours * 60 * 60
+    if settings.idempotency_backend == "memory":
+        return MemoryIdempotencyStore(ttl_seconds, settings.idempotency_wait_seconds)
+    return DatabaseIdempotencyStore(ttl_seconds, settings.idempotency_wait_seconds)
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, store: IdempotencyStore | None = None):
+        super().__init__(app)
+        self.store = store or get_idempotency_store()
+
+    async def dispatch(self, request: Request, call_next):
+        client_key = request.headers.get("idempotency-key")
+        if not client_key or (request.method, request.url.path.rstrip("/")) not in IDEMPOTENT_ROUTES:
+            return await call_next(request)
+
+        # Keys are scoped to the caller's credentials so two users can't replay each other's responses
+        scope = request.headers.get("authorization", "")
+        key = hashlib.sha256(f"{scope}\n{client_key}".encode()).hexdigest()
+        body = await request.body()
+        request_hash = hashlib.sha256(request.method.encode() + request.url.path.encode() + b"\n" + body).hexdigest()
+
+        try:
+            stored = await run_in_threadpool(self.store.begin, key, request_hash)
+        except IdempotencyConflict as e:
+            return JSONResponse({"detail": e.detail}, status_code=e.status_code)
+
+        if stored is not None:
+            return Response(
+                stored.body, status_code=stored.status_code, media_type=stored.content_type,
+                headers={"Idempotent-Replayed": "true"})
+
+        try:
+            response = await call_next(request)
+            response_body = b"".join([chunk async for chunk in response.body_iterator])
+        except Exception:
+            await run_in_threadpool(self.store.release, key)
+            raise
+
+        if response.status_code >= 500:
+            await run_in_threadpool(self.store.release, key)
+        else:
+            await run_in_threadpool(
+                self.store.complete, key, response.status_code, response.headers.get("content-type"), response_body)
+
+        replayable = Response(response_body, status_code=response.status_code)
+        replayable.raw_headers = response.raw_headers
+        return replayable
@@ -1,6 +1,6 @@
 from fastapi.security.http import HTTPAuthorizationCredentials
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from functools import lru_cache
 from app.core.config import settings
 from jose import JWTError, jwt
 from app.schemas.auth import LoginResponse
@@ -13,21 +13,26 @@ from app.db.database import get_db
 from app.utils.responses import ResponseHandler
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 auth_scheme = HTTPBearer()
 
-# Create Hash Password
+
+# Built on first use, so passlib and its bcrypt backend stay out of the app's startup
+@lru_cache(maxsize=None)
+def get_password_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+# Create Hash Password
 def get_password_hash(password):
     # Truncate password to 72 bytes as bcrypt has a limit
     truncated_password = password.encode('utf-8')[:72].decode('utf-8', 'ignore')
-    return pwd_context.hash(truncated_password)
+    return get_password_context().hash(truncated_password)
 
 
 # Verify Hash Password
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_password_context().verify(plain_password, hashed_password)
 
 
 # Create Access & Refresh Token
@@ -64,6 +69,24 @@ async def create_refresh_token(data):
     return jwt.encode(data, settings.secret_key, settings.algorithm)
 
 
+# Create Guest Cart Token
+def create_guest_cart_token(items: list[tuple[int, int]], price_version: str):
+    expire = datetime.utcnow() + timedelta(days=settings.guest_cart_expire_days)
+    payload = {"typ": "guest_cart", "i": [list(item) for item in items], "v": price_version, "exp": expire}
+    return jwt.encode(payload, settings.secret_key, algorithm=settings.algorithm)
+
+
+# Get Items Of Guest Cart Token
+def get_guest_cart_payload(token: str):
+    try:
+        payload = jwt.decode(token, settings.secret_key, [settings.algorithm])
+    except JWTError:
+        raise ResponseHandler.invalid_token('guest cart')
+    if payload.get("typ") != "guest_cart":
+        raise ResponseHandler.invalid_token('guest cart')
+    return [(int(product_id), int(quantity)) for product_id, quantity in payload.get("i", [])], payload.get("v")
+
+
 # Get Payload Of Token
 def get_token_payload(token):
     try:
@@ -87,6 +110,14 @@ def get_current_user(token: HTTPAuthorizationCredentials = Depends(auth_scheme),
     return get_user_from_token(token.credentials, db)
 
 
+# User id of a valid access token, without loading the user
+def get_token_user_id(token: HTTPAuthorizationCredentials = Depends(auth_scheme)):
+    user_id = get_token_payload(token.credentials).get('id')
+    if user_id is None:
+        raise ResponseHandler.invalid_token('access')
+    return user_id
+
+
 def get_current_user_id(token: HTTPAuthorizationCredentials = Depends(auth_scheme), db: Session = Depends(get_db)):
     user = get_user_from_token(token.credentials, db)
     return user.id
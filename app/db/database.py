@@ -1,22 +1,47 @@
+from threading import Lock
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from typing import Generator
 from app.core.config import settings
 
 
-DATABASE_URL = settings.database_url
+# Establish a connection to the PostgreSQL database. The engine, and with it the DB driver,
+# is created by the first session rather than at import, which keeps it out of the cold start.
+_engine: Engine | None = None
+_engine_lock = Lock()
 
-# Establish a connection to the PostgreSQL database
-engine = create_engine(DATABASE_URL)
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(settings.database_url)
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def dispose_engine(close: bool = True):
+    """Drop the pooled connections. close=False only forgets them, for a process that was forked
+    with the parent's pool and must not close the parent's sockets."""
+    if _engine is not None:
+        _engine.dispose(close=close)
 
 
 # Create database tables based on the defined SQLAlchemy models (subclasses of the Base class)
 Base = declarative_base()
 
 
+class LazySessionMaker(sessionmaker):
+    def __call__(self, **local_kw):
+        get_engine()
+        return super().__call__(**local_kw)
+
+
 # Connect to the database and provide a session for interacting with it
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = LazySessionMaker(autocommit=False, autoflush=False)
 
 
 def get_db() -> Generator:
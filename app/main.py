@@ -1,14 +1,25 @@
-from app.routers import products, categories, carts, users, auth, orders, wishlist, reviews
+from app.routers import products, categories, carts, users, auth, orders, wishlist, reviews, promotions, jobs, analytics, events
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.compression import CompressionMiddleware
+from app.db.database import dispose_engine
 
 description = """
 Welcome to the E-commerce API!
 """
 
 
+# Heavy components (DB engine, password hashing) are created on first use, not during startup
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    dispose_engine()
+
+
 app = FastAPI(
     description="",
     title="E-commerce API",
@@ -20,8 +31,11 @@ app = FastAPI(
         "tryItOutEnabled": True,
         "onComplete": "Ok"
     },
+    lifespan=lifespan,
 )
 
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "https://street-owear-ecom-website.vercel.app"],
@@ -30,6 +44,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
 app.mount("/uploads", StaticFiles(directory=os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")), name="uploads")
 
 app.include_router(products.router)
@@ -40,4 +56,8 @@ app.include_router(auth.router)
 app.include_router(orders.router)
 app.include_router(wishlist.router)
 app.include_router(reviews.router)
+app.include_router(promotions.router)
+app.include_router(jobs.router)
+app.include_router(analytics.router)
+app.include_router(events.router)
 
@@ -0,0 +1,62 @@
+import argparse
+from datetime import date
+from app.db.database import SessionLocal
+from app.core.config import settings
+from app.services.analytics import AnalyticsService
+from app.services.partitions import PartitionService
+from app.services.reviews import ReviewService
+
+
+def backfill_rollups(args):
+    with SessionLocal() as db:
+        AnalyticsService.backfill(db, args.start, args.end)
+    print(f"Rebuilt sales rollups from {args.start or 'the first order'} to {args.end or 'today'}")
+
+
+def ensure_partitions(args):
+    with SessionLocal() as db:
+        created = PartitionService.ensure_partitions(db, args.months_ahead)
+    print(f"Created {len(created)} order partitions" + (f": {', '.join(created)}" if created else ""))
+
+
+def archive_orders(args):
+    with SessionLocal() as db:
+        archived = PartitionService.archive_before(db, args.before)
+    for name, count in archived:
+        print(f"Archived {count} orders from {name}")
+    print(f"Archived {len(archived)} partitions before {args.before}")
+
+
+def reconcile_reviews(args):
+    with SessionLocal() as db:
+        repaired = ReviewService.reconcile_aggregates(db, args.product_ids)
+    print(f"Repaired review aggregates of {len(repaired)} products" + (f": {repaired}" if repaired else ""))
+
+
+def parse_month(value: str) -> date:
+    return date.fromisoformat(f"{value}-01")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance commands for the e-commerce API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill-rollups", help="Rebuild the sales rollup tables from orders")
+    backfill.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+    backfill.add_argument("--end", type=date.fromisoformat, help="Day after the last day to rebuild (YYYY-MM-DD)")
+    backfill.set_defaults(handler=backfill_rollups)
+
+    partitions = commands.add_parser("ensure-partitions", help="Create the upcoming monthly order partitions")
+    partitions.add_argument("--months-ahead", type=int, default=settings.order_partition_months_ahead)
+    partitions.set_defaults(handler=ensure_partitions)
+
+    archive = commands.add_parser("archive-orders", help="Move monthly order partitions into orders_archive")
+    archive.add_argument("--before", type=parse_month, required=True, help="Archive every month before this one (YYYY-MM)")
+    archive.set_defaults(handler=archive_orders)
+
+    reviews = commands.add_parser("reconcile-reviews", help="Verify product review aggregates and repair drift")
+    reviews.add_argument("--product-ids", type=int, nargs="+", help="Only check these products")
+    reviews.set_defaults(handler=reconcile_reviews)
+
+    args = parser.parse_args()
+    args.handler(args)
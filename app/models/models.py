@@ -1,7 +1,9 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Float, ARRAY, Enum, Table
-from sqlalchemy.sql.expression import text
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Float, ARRAY, Enum, Table, LargeBinary, JSON, Index, Date, ForeignKeyConstraint
+from sqlalchemy.sql.expression import func, text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
 from app.db.database import Base
 from datetime import datetime
 
@@ -10,7 +12,9 @@ wishlist_items = Table(
     'wishlist_items',
     Base.metadata,
     Column('wishlist_id', Integer, ForeignKey('wishlists.id'), primary_key=True),
-    Column('product_id', Integer, ForeignKey('products.id', ondelete="CASCADE"), primary_key=True)
+    Column('product_id', Integer, ForeignKey('products.id', ondelete="CASCADE"), primary_key=True),
+    # Wishlisters of a product, for notification fan-out
+    Index('ix_wishlist_items_product_id', 'product_id'),
 )
 
 
@@ -53,6 +57,10 @@ class Cart(Base):
     # Relationship with cart items
     cart_items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_carts_user_id", "user_id"),
+    )
+
 
 class CartItem(Base):
     __tablename__ = "cart_items"
@@ -67,6 +75,11 @@ class CartItem(Base):
     cart = relationship("Cart", back_populates="cart_items")
     product = relationship("Product", back_populates="cart_items")
 
+    # Cart lookups and the in_cart flag of product listings
+    __table_args__ = (
+        Index("ix_cart_items_cart_id_product_id", "cart_id", "product_id"),
+    )
+
 
 class Category(Base):
     __tablename__ = "categories"
@@ -75,10 +88,24 @@ class Category(Base):
     name = Column(String, unique=True, nullable=False)
     description = Column(String, nullable=True) # Added description column
     thumbnail = Column(String, nullable=True)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), onupdate=func.clock_timestamp(), nullable=False)
+
+    # Tree position: the parent and the materialized path of ids from the root, e.g. "1/5/12/",
+    # so a subtree is one indexed prefix match on path
+    parent_id = Column(Integer, ForeignKey("categories.id", ondelete="RESTRICT"), nullable=True)
+    path = Column(String, nullable=False)
 
     # Relationship with products
     products = relationship("Product", back_populates="category")
 
+    # Trigram index for substring search on name
+    __table_args__ = (
+        Index("ix_categories_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_categories_path", "path", postgresql_ops={"path": "varchar_pattern_ops"}),
+        Index("ix_categories_parent_id", "parent_id"),
+        Index("ix_categories_updated_at", "updated_at"),
+    )
+
 
 class Product(Base):
     __tablename__ = "products"
@@ -95,10 +122,19 @@ class Product(Base):
     thumbnail = Column(String, nullable=False)
     is_published = Column(Boolean, server_default="True", nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+    # Bumped by every UPDATE, stock changes included, and read as the catalog's Last-Modified.
+    # clock_timestamp() rather than NOW(), which is the transaction's start and can predate a concurrent commit.
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), onupdate=func.clock_timestamp(), nullable=False)
 
-    # New fields for reviews
+    # Review aggregates, updated in place by ReviewService and repaired by `python -m app.manage reconcile-reviews`
     average_rating = Column(Float, default=0.0)
-    review_count = Column(Integer, default=0)
+    review_count = Column(Integer, nullable=False, server_default="0")
+    rating_sum = Column(Integer, nullable=False, server_default="0")
+    rating_1_count = Column(Integer, nullable=False, server_default="0")
+    rating_2_count = Column(Integer, nullable=False, server_default="0")
+    rating_3_count = Column(Integer, nullable=False, server_default="0")
+    rating_4_count = Column(Integer, nullable=False, server_default="0")
+    rating_5_count = Column(Integer, nullable=False, server_default="0")
 
     # Relationship with category
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
@@ -117,6 +153,11 @@ class Product(Base):
     # Relationship with reviews
     reviews = relationship("Review", back_populates="product", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_products_category_id", "category_id"),
+        Index("ix_products_updated_at", "updated_at"),
+    )
+
 
 class ProductImage(Base):
     __tablename__ = "product_images"
@@ -131,9 +172,10 @@ class ProductImage(Base):
 class Order(Base):
     __tablename__ = "orders"
 
-    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
+    # Range partitioned by created_at month, so the partition key is part of the primary key
+    id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), primary_key=True, server_default=text("NOW()"), nullable=False)
     total_amount = Column(Float, nullable=False)
     status = Column(String, nullable=False, server_default="pending")
     address = Column(String, nullable=True)
@@ -142,12 +184,22 @@ class Order(Base):
     user = relationship("User", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
+    # Keyset pagination runs on (created_at, id), optionally narrowed by user or status
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
-    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    # Partitioned by the month of the parent order, which also completes the composite foreign key
+    id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
+    order_id = Column(Integer, nullable=False, index=True)
+    order_created_at = Column(TIMESTAMP(timezone=True), primary_key=True, nullable=False)
     product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
     quantity = Column(Integer, nullable=False)
     subtotal = Column(Float, nullable=False)
@@ -155,6 +207,12 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="order_items")
     product = relationship("Product", back_populates="order_items")
 
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["order_id", "order_created_at"], ["orders.id", "orders.created_at"], ondelete="CASCADE"),
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
+    )
+
 
 class Wishlist(Base):
     __tablename__ = "wishlists"
@@ -176,4 +234,157 @@ class Review(Base):
     created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"))
 
     product = relationship("Product", back_populates="reviews")
-    user = relationship("User", back_populates="reviews")
\ No newline at end of file
+    user = relationship("User", back_populates="reviews")
+
+    # Keyset pagination of a product's reviews by date and by rating, and of the admin feed
+    __table_args__ = (
+        Index("ix_reviews_product_id_created_at_id", "product_id", "created_at", "id"),
+        Index("ix_reviews_product_id_rating_id", "product_id", "rating", "id"),
+        Index("ix_reviews_created_at_id", "created_at", "id"),
+        Index("ix_reviews_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+class Promotion(Base):
+    __tablename__ = "promotions"
+
+    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    kind = Column(Enum("coupon", "tiered", "bundle", name="promotion_kinds"), nullable=False)
+    coupon_code = Column(String, unique=True, nullable=True)
+    discount_percentage = Column(Float, nullable=False)
+
+    # Scope of the promotion, both empty means it applies to every product
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=True)
+
+    # Thresholds for tiered discounts and coupons
+    min_quantity = Column(Integer, nullable=False, server_default="1")
+    min_subtotal = Column(Float, nullable=False, server_default="0")
+
+    # Products that must be bought together for a bundle deal
+    bundle_product_ids = Column(ARRAY(Integer), nullable=True)
+
+    is_active = Column(Boolean, server_default="True", nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+
+
+class TaxRate(Base):
+    __tablename__ = "tax_rates"
+
+    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
+    region = Column(String, unique=True, nullable=False)
+    rate = Column(Float, nullable=False)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # Hash of the client key scoped to the caller, so keys stay fixed size
+    key = Column(String(64), primary_key=True, nullable=False)
+    request_hash = Column(String(64), nullable=False)
+
+    # Empty until the first request finishes, concurrent retries wait on it
+    status_code = Column(Integer, nullable=True)
+    content_type = Column(String, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum("queued", "running", "done", "dead", name="job_statuses"), nullable=False, server_default="queued")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="5")
+    last_error = Column(String, nullable=True)
+    run_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+    locked_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+
+# Back-in-stock and price-drop changes waiting to be sent to a wishlister in their next digest
+class WishlistNotification(Base):
+    __tablename__ = "wishlist_notifications"
+
+    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(Enum("back_in_stock", "price_drop", name="wishlist_notification_kinds"), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_wishlist_notifications_user_id_id", "user_id", "id"),
+    )
+
+
+# Transactional outbox of order and stock changes, written in the same transaction as the change
+# and fanned out to live subscribers by app.core.events
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    topics = Column(postgresql.ARRAY(String), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_outbox_events_created_at", "created_at"),
+    )
+
+
+# Sales rollups, kept up to date by OrderService and rebuilt with `python -m app.manage backfill-rollups`.
+# Product and category ids carry no foreign keys so history survives catalog deletions.
+class SalesDaily(Base):
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True, nullable=False)
+    order_count = Column(Integer, nullable=False, server_default="0")
+    items_sold = Column(Integer, nullable=False, server_default="0")
+    revenue = Column(Float, nullable=False, server_default="0")
+
+
+class SalesDailyProduct(Base):
+    __tablename__ = "sales_daily_products"
+
+    day = Column(Date, primary_key=True, nullable=False)
+    product_id = Column(Integer, primary_key=True, nullable=False)
+    order_count = Column(Integer, nullable=False, server_default="0")
+    quantity = Column(Integer, nullable=False, server_default="0")
+    revenue = Column(Float, nullable=False, server_default="0")
+
+
+class SalesDailyCategory(Base):
+    __tablename__ = "sales_daily_categories"
+
+    day = Column(Date, primary_key=True, nullable=False)
+    category_id = Column(Integer, primary_key=True, nullable=False)
+    quantity = Column(Integer, nullable=False, server_default="0")
+    revenue = Column(Float, nullable=False, server_default="0")
+
+
+# Orders moved out of the partitioned tables by `python -m app.manage archive-orders`.
+# Items are kept as one JSONB document per order, which Postgres stores TOAST-compressed.
+class OrderArchive(Base):
+    __tablename__ = "orders_archive"
+
+    id = Column(Integer, primary_key=True, nullable=False, autoincrement=False)
+    user_id = Column(Integer, nullable=False, index=True)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    total_amount = Column(Float, nullable=False)
+    status = Column(String, nullable=False)
+    address = Column(String, nullable=True)
+    payment_method = Column(String, nullable=True)
+    order_items = Column(JSONB, nullable=False)
+    archived_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
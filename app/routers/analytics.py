@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Query, status
+from app.db.database import get_db
+from app.services.analytics import AnalyticsService
+from sqlalchemy.orm import Session
+from app.schemas.analytics import SalesSummaryOut, SalesDaysOut, ProductSalesOut, CategorySalesOut
+from app.core.security import check_admin_role
+from datetime import date
+
+
+router = APIRouter(tags=["Analytics"], prefix="/admin/analytics", dependencies=[Depends(check_admin_role)])
+
+
+# Revenue, orders and items sold over a date range
+@router.get("/summary", status_code=status.HTTP_200_OK, response_model=SalesSummaryOut)
+def get_sales_summary(
+    db: Session = Depends(get_db),
+    start: date | None = Query(None, description="First day, defaults to 30 days before end"),
+    end: date | None = Query(None, description="Day after the last day, defaults to tomorrow"),
+):
+    return AnalyticsService.get_summary(db, start, end)
+
+
+# Orders and revenue per day
+@router.get("/daily", status_code=status.HTTP_200_OK, response_model=SalesDaysOut)
+def get_daily_sales(
+    db: Session = Depends(get_db),
+    start: date | None = Query(None, description="First day, defaults to 30 days before end"),
+    end: date | None = Query(None, description="Day after the last day, defaults to tomorrow"),
+):
+    return AnalyticsService.get_daily(db, start, end)
+
+
+# Best selling products by revenue
+@router.get("/top-products", status_code=status.HTTP_200_OK, response_model=ProductSalesOut)
+def get_top_products(
+    db: Session = Depends(get_db),
+    start: date | None = Query(None, description="First day, defaults to 30 days before end"),
+    end: date | None = Query(None, description="Day after the last day, defaults to tomorrow"),
+    limit: int = Query(10, ge=1, le=100, description="Number of products"),
+):
+    return AnalyticsService.get_top_products(db, start, end, limit)
+
+
+# Revenue per category
+@router.get("/categories", status_code=status.HTTP_200_OK, response_model=CategorySalesOut)
+def get_category_sales(
+    db: Session = Depends(get_db),
+    start: date | None = Query(None, description="First day, defaults to 30 days before end"),
+    end: date | None = Query(None, description="Day after the last day, defaults to tomorrow"),
+):
+    return AnalyticsService.get_categories(db, start, end)
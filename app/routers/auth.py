@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status, Header
+from fastapi import APIRouter, Depends, status, Header, Cookie, Response
 from sqlalchemy.orm import Session
 from app.services.auth import AuthService
 from app.db.database import get_db
@@ -12,22 +12,37 @@ router = APIRouter(tags=["Auth"], prefix="/auth")
 @router.post("/signup", status_code=status.HTTP_200_OK, response_model=UserOut)
 async def user_signup(
         user: Signup,
-        db: Session = Depends(get_db)):
-    return await AuthService.signup(db, user)
+        response: Response,
+        db: Session = Depends(get_db),
+        guest_cart: str | None = Cookie(None)):
+    result = await AuthService.signup(db, user, guest_cart)
+    if guest_cart:
+        response.delete_cookie("guest_cart")
+    return result
 
 
 @router.post("/login/user", status_code=status.HTTP_200_OK)
 async def user_login(
+        response: Response,
         user_credentials: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)):
-    return await AuthService.login_for_role(user_credentials, db, required_role="user")
+        db: Session = Depends(get_db),
+        guest_cart: str | None = Cookie(None)):
+    result = await AuthService.login_for_role(user_credentials, db, required_role="user", guest_cart=guest_cart)
+    if guest_cart:
+        response.delete_cookie("guest_cart")
+    return result
 
 
 @router.post("/login/admin", status_code=status.HTTP_200_OK)
 async def admin_login(
+        response: Response,
         user_credentials: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)):
-    return await AuthService.login_for_role(user_credentials, db, required_role="admin")
+        db: Session = Depends(get_db),
+        guest_cart: str | None = Cookie(None)):
+    result = await AuthService.login_for_role(user_credentials, db, required_role="admin", guest_cart=guest_cart)
+    if guest_cart:
+        response.delete_cookie("guest_cart")
+    return result
 
 
 @router.post("/refresh", status_code=status.HTTP_200_OK)
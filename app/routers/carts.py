@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, status, Cookie, Header, Response
 from app.db.database import get_db
-from app.services.carts import CartService
+from app.services.carts import CartService, GuestCartService
+from app.core.config import settings
 from sqlalchemy.orm import Session
-from app.schemas.carts import CartCreate, CartUpdate, CartOut, CartOutDelete, CartsOutList
+from app.schemas.carts import CartBase, CartCreate, CartUpdate, CartOut, CartOutDelete, CartsOutList, GuestCartOut
 from app.core.security import get_current_user
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
+from app.utils.serialization import TrustedJSONResponse, parse_fieldset
 
 router = APIRouter(tags=["Carts"], prefix="/carts")
 auth_scheme = HTTPBearer()
@@ -16,9 +18,34 @@ def get_all_carts(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
+    fields: str | None = Query(None, description="Comma separated fields of each cart, e.g. id,total_amount"),
+    expand: str | None = Query(None, description="Comma separated relationships to embed: cart_items"),
     token: HTTPAuthorizationCredentials = Depends(auth_scheme)
 ):
-    return CartService.get_all_carts(token, db, page, limit)
+    fieldset = parse_fieldset(CartBase, fields, expand)
+    return TrustedJSONResponse(CartsOutList, CartService.get_all_carts(token, db, page, limit, fieldset), fields=fieldset)
+
+
+# Guest carts live in a signed cookie (or X-Guest-Cart header), so they need no auth and no DB writes
+@router.get("/guest", status_code=status.HTTP_200_OK, response_model=GuestCartOut)
+def get_guest_cart(
+        db: Session = Depends(get_db),
+        guest_cart: str | None = Cookie(None),
+        x_guest_cart: str | None = Header(None)):
+    return GuestCartService.get_guest_cart(db, x_guest_cart or guest_cart)
+
+
+@router.put("/guest", status_code=status.HTTP_200_OK, response_model=GuestCartOut)
+def update_guest_cart(
+        updated_cart: CartUpdate,
+        response: Response,
+        db: Session = Depends(get_db)):
+    guest_cart = GuestCartService.update_guest_cart(db, updated_cart)
+    response.set_cookie(
+        "guest_cart", guest_cart["data"]["token"],
+        max_age=settings.guest_cart_expire_days * 24 * 60 * 60,
+        httponly=True, samesite="lax")
+    return guest_cart
 
 
 @router.get("/{cart_id}", status_code=status.HTTP_200_OK, response_model=CartOut)
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, Query, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, Query, Request, status, File, UploadFile, Form
 from app.db.database import get_db
 from app.services.categories import CategoryService
 from sqlalchemy.orm import Session
-from app.schemas.categories import CategoryCreate, CategoryOut, CategoriesOut, CategoryOutDelete, CategoryUpdate
+from app.schemas.categories import CategoryCreate, CategoryOut, CategoriesOut, CategoryMenuOut, CategoryTreeOut, CategoryOutDelete, CategoryUpdate
 from app.core.security import check_admin_role
+from app.core.compression import PrecompressedResponse
+from app.services.catalog import CatalogService
+from app.utils.conditional import conditional_response, weak_etag
+from app.utils.serialization import TrustedJSONResponse
 
 
 router = APIRouter(tags=["Categories"], prefix="/categories")
@@ -15,12 +19,37 @@ router = APIRouter(tags=["Categories"], prefix="/categories")
     status_code=status.HTTP_200_OK,
     response_model=CategoriesOut)
 def get_all_categories(
+    request: Request,
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
     search: str | None = Query("", description="Search based name of categories"),
 ):
-    return CategoryService.get_all_categories(db, page, limit, search)
+    version = CatalogService.get_catalog_version(db)
+    return conditional_response(
+        request, weak_etag("categories", version.tag, request.url.query), version.updated_at,
+        lambda: TrustedJSONResponse(CategoriesOut, CategoryService.get_all_categories(db, page, limit, search)))
+
+
+# Get Category Menu With Product Counts
+@router.get(
+    "/menu",
+    status_code=status.HTTP_200_OK,
+    response_model=CategoryMenuOut)
+def get_category_menu(request: Request, db: Session = Depends(get_db)):
+    # Cached bodies carry their own ETag, so a revalidation costs no query at all
+    body = CategoryService.get_category_menu(db)
+    return conditional_response(request, body.etag, None, lambda: PrecompressedResponse(body))
+
+
+# Get Category Tree For Navigation
+@router.get(
+    "/tree",
+    status_code=status.HTTP_200_OK,
+    response_model=CategoryTreeOut)
+def get_category_tree(request: Request, db: Session = Depends(get_db)):
+    body = CategoryService.get_category_tree(db)
+    return conditional_response(request, body.etag, None, lambda: PrecompressedResponse(body))
 
 
 # Get Category By ID
@@ -28,8 +57,11 @@ def get_all_categories(
     "/{category_id}",
     status_code=status.HTTP_200_OK,
     response_model=CategoryOut)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    return CategoryService.get_category(db, category_id)
+def get_category(category_id: int, request: Request, db: Session = Depends(get_db)):
+    version = CatalogService.get_catalog_version(db)
+    return conditional_response(
+        request, weak_etag("category", category_id, version.tag), version.updated_at,
+        lambda: TrustedJSONResponse(CategoryOut, CategoryService.get_category(db, category_id)))
 
 
 # Create New Category
@@ -42,9 +74,10 @@ def create_category(
     name: str = Form(...),
     description: str = Form(...),
     thumbnail: UploadFile = File(...),
+    parent_id: int | None = Form(None),
     db: Session = Depends(get_db)
 ):
-    return CategoryService.create_category(db, name, description, thumbnail)
+    return CategoryService.create_category(db, name, description, thumbnail, parent_id)
 
 
 # Update Existing Category
@@ -58,8 +91,9 @@ def update_category(
         name: str = Form(...),
         description: str = Form(...),
         thumbnail: UploadFile | None = File(None),
+        parent_id: int | None = Form(None, ge=0, description="New parent category, 0 for top level"),
         db: Session = Depends(get_db)):
-    return CategoryService.update_category(db, category_id, name, description, thumbnail)
+    return CategoryService.update_category(db, category_id, name, description, thumbnail, parent_id)
 
 
 # Delete Category By ID
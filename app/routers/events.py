@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+from app.core.events import stream_events
+from app.core.security import get_user_from_token
+from app.db.database import get_db
+from app.models.models import User
+from app.services.events import EventService
+
+
+router = APIRouter(tags=["Events"], prefix="/events")
+optional_auth_scheme = HTTPBearer(auto_error=False)
+
+
+# A sync dependency runs in the threadpool, so the user lookup doesn't block the event loop that
+# serves every open stream. The session is closed here, the stream itself never uses it.
+def get_stream_user(
+    access_token: str | None = Query(None, description="For EventSource clients, which can't send an Authorization header"),
+    token: HTTPAuthorizationCredentials | None = Depends(optional_auth_scheme),
+    db: Session = Depends(get_db),
+):
+    credentials = token.credentials if token else access_token
+    try:
+        return get_user_from_token(credentials, db) if credentials else None
+    finally:
+        db.close()
+
+
+# Live Order & Stock Events (Server-Sent Events)
+@router.get("/stream")
+async def stream(
+    request: Request,
+    topics: str = Query(..., description="Comma separated: orders (admin), orders:me, products:<id>"),
+    last_event_id: int | None = Header(None, description="Resume after this event instead of sending a snapshot"),
+    user: User | None = Depends(get_stream_user),
+):
+    resolved = EventService.resolve_topics([name.strip() for name in topics.split(",") if name.strip()], user)
+
+    return StreamingResponse(
+        stream_events(request, resolved, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
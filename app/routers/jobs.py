@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query, status
+from app.db.database import get_db
+from app.services.jobs import JobService
+from sqlalchemy.orm import Session
+from app.core.security import check_admin_role
+
+
+router = APIRouter(tags=["Jobs"], prefix="/jobs", dependencies=[Depends(check_admin_role)])
+
+
+# Queue depth per job kind and status
+@router.get("/stats", status_code=status.HTTP_200_OK)
+def get_job_stats(db: Session = Depends(get_db)):
+    return JobService.get_stats(db)
+
+
+# Dead-lettered jobs
+@router.get("/dead", status_code=status.HTTP_200_OK)
+def get_dead_jobs(
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=500, description="Number of jobs"),
+):
+    return JobService.get_dead_jobs(db, limit)
+
+
+# Requeue A Dead Job
+@router.post("/{job_id}/retry", status_code=status.HTTP_200_OK)
+def retry_job(job_id: int, db: Session = Depends(get_db)):
+    return JobService.retry_job(db, job_id)
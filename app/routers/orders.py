@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from app.db.database import get_db
-from app.services.orders import OrderService
+from app.services.orders import OrderService, ORDER_STATUS_TRANSITIONS
 from sqlalchemy.orm import Session
-from app.schemas.orders import OrderOut, OrdersOut, OrderCreate
+from app.schemas.orders import OrderOut, OrdersOut, OrderCreate, OrderSummariesOut, BulkOrderStatusUpdate, BulkOrderStatusOut
 from app.core.security import get_current_user, check_admin_role
+from app.utils.responses import ResponseHandler
 from app.models.models import User
+from app.utils.serialization import TrustedJSONResponse, item_model, parse_fieldset
+from datetime import datetime
 
 router = APIRouter(tags=["Orders"], prefix="/orders")
 
@@ -16,35 +20,78 @@ def create_order(
 ):
     return OrderService.create_order(db, user.id, order_details)
 
-@router.get("/", status_code=status.HTTP_200_OK, response_model=OrdersOut)
+@router.get("/", status_code=status.HTTP_200_OK, response_model=OrdersOut | OrderSummariesOut)
 def get_user_orders(
     db: Session = Depends(get_db),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number, ignored when cursor is set"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    order_status: str | None = Query(None, alias="status", description="Filter by order status"),
+    created_from: datetime | None = Query(None, description="Orders created at or after"),
+    created_to: datetime | None = Query(None, description="Orders created before"),
+    view: str = Query("full", enum=["full", "summary"], description="summary skips the nested products"),
+    fields: str | None = Query(None, description="Comma separated fields of each order, e.g. id,status,total_amount"),
+    expand: str | None = Query(None, description="Comma separated relationships to embed: order_items"),
     user: User = Depends(get_current_user)
 ):
-    return OrderService.get_user_orders(db, user.id, page, limit)
+    # The view picks the model, so the union response_model is never tried member by member
+    model = OrderSummariesOut if view == "summary" else OrdersOut
+    fieldset = parse_fieldset(item_model(model), fields, expand)
+    orders = OrderService.get_user_orders(
+        db, user.id, limit, cursor, page,
+        order_status=order_status, created_from=created_from, created_to=created_to, view=view, fields=fieldset)
+    return TrustedJSONResponse(model, orders, fields=fieldset)
 
-@router.get("/all", status_code=status.HTTP_200_OK, response_model=OrdersOut, dependencies=[Depends(check_admin_role)])
+@router.get("/all", status_code=status.HTTP_200_OK, response_model=OrdersOut | OrderSummariesOut, dependencies=[Depends(check_admin_role)])
 def get_all_orders(
     db: Session = Depends(get_db),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number, ignored when cursor is set"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    order_status: str | None = Query(None, alias="status", description="Filter by order status"),
+    created_from: datetime | None = Query(None, description="Orders created at or after"),
+    created_to: datetime | None = Query(None, description="Orders created before"),
+    view: str = Query("full", enum=["full", "summary"], description="summary skips the nested products"),
+    fields: str | None = Query(None, description="Comma separated fields of each order, e.g. id,status,total_amount"),
+    expand: str | None = Query(None, description="Comma separated relationships to embed: order_items"),
 ):
-    return OrderService.get_all_orders(db, page, limit)
+    model = OrderSummariesOut if view == "summary" else OrdersOut
+    fieldset = parse_fieldset(item_model(model), fields, expand)
+    orders = OrderService.get_all_orders(
+        db, limit, cursor, page,
+        order_status=order_status, created_from=created_from, created_to=created_to, view=view, fields=fieldset)
+    return TrustedJSONResponse(model, orders, fields=fieldset)
+
+@router.put("/bulk/status", status_code=status.HTTP_200_OK, response_model=BulkOrderStatusOut, dependencies=[Depends(check_admin_role)])
+def bulk_update_order_status(
+    bulk_update: BulkOrderStatusUpdate,
+    stream: bool = Query(False, description="Apply in chunks and stream NDJSON progress"),
+    db: Session = Depends(get_db),
+):
+    if bulk_update.target_status not in ORDER_STATUS_TRANSITIONS:
+        ResponseHandler.bad_request_error(f"Unknown order status {bulk_update.target_status}")
+
+    filters = bulk_update.filter.model_dump() if bulk_update.filter else None
+    if stream:
+        return StreamingResponse(
+            OrderService.stream_bulk_update_status(bulk_update.target_status, bulk_update.order_ids, filters),
+            media_type="application/x-ndjson")
+    return OrderService.bulk_update_status(db, bulk_update.target_status, bulk_update.order_ids, filters)
 
 @router.put("/{order_id}/status", status_code=status.HTTP_200_OK, response_model=OrderOut, dependencies=[Depends(check_admin_role)])
 def update_order_status(
     order_id: int,
     new_status: str = Query(..., description="New status for the order"),
+    created_at: datetime | None = Query(None, description="The order's created_at, so only its monthly partition is read"),
     db: Session = Depends(get_db),
 ):
-    return OrderService.update_order_status(db, order_id, new_status)
+    return OrderService.update_order_status(db, order_id, new_status, created_at)
 
 @router.delete("/{order_id}", status_code=status.HTTP_200_OK)
 def delete_order(
     order_id: int,
+    created_at: datetime | None = Query(None, description="The order's created_at, so only its monthly partition is read"),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    return OrderService.delete_order(db, order_id, user.id)
+    return OrderService.delete_order(db, order_id, user.id, created_at)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, Query, Request, status, File, UploadFile, Form
 from app.db.database import get_db
 from app.services.products import ProductService
 from sqlalchemy.orm import Session
@@ -6,6 +6,10 @@ from app.schemas.products import ProductCreate, ProductOut, ProductsOut, Product
 from app.core.security import get_current_user, check_admin_role
 from pydantic import ValidationError
 from app.models.models import User
+from app.utils.responses import ResponseHandler
+from app.utils.serialization import TrustedJSONResponse, parse_fieldset
+from app.utils.conditional import conditional_response, weak_etag
+from app.services.catalog import CatalogService
 
 router = APIRouter(tags=["Products"], prefix="/products")
 
@@ -13,21 +17,49 @@ router = APIRouter(tags=["Products"], prefix="/products")
 # Get All Products
 @router.get("/", status_code=status.HTTP_200_OK, response_model=ProductsOut)
 def get_all_products(
+    request: Request,
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=0, le=100, description="Items per page"), # Changed ge=1 to ge=0
     search: str | None = Query("", description="Search based title of products"),
-    category_id: int | None = Query(None, description="Filter by category ID"),
+    category_id: int | None = Query(None, description="Filter by category ID, subcategories included"),
     sort_by: str | None = Query(None, description="Sort by column (e.g., 'created_at')"),
+    include: str | None = Query(None, description="Comma separated per-user flags: wishlisted, in_cart"),
+    fields: str | None = Query(None, description="Comma separated fields of each product, e.g. id,title,price,thumbnail,rating"),
+    expand: str | None = Query(None, description="Comma separated relationships to embed: images, category"),
     current_user: User = Depends(get_current_user)
 ):
-    return ProductService.get_all_products(db, page, limit, search, category_id, sort_by, current_user)
+    flags = {flag.strip() for flag in include.split(",") if flag.strip()} if include else set()
+    unknown = flags - {"wishlisted", "in_cart"}
+    if unknown:
+        ResponseHandler.bad_request_error(f"Unknown include {', '.join(sorted(unknown))}")
+    fieldset = parse_fieldset(ProductOut, fields, expand)
+    if fieldset is not None:
+        fieldset |= flags
+
+    def render():
+        # current_user by keyword: passed positionally it landed in sort_dir and non-admins were shown unavailable products
+        products = ProductService.get_all_products(
+            db, page, limit, search, category_id, sort_by, current_user=current_user, include=flags, fields=fieldset)
+        return TrustedJSONResponse(ProductsOut, products, fields=fieldset)
+
+    # Per-user flags change with the user's wishlist and cart, which the catalog version doesn't cover
+    if flags:
+        return render()
+    version = CatalogService.get_catalog_version(db)
+    etag = weak_etag("products", version.tag, request.url.query, current_user.role)
+    return conditional_response(request, etag, version.updated_at, render)
 
 
 # Get Product By ID
 @router.get("/{product_id}", status_code=status.HTTP_200_OK, response_model=ProductOut)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    return ProductService.get_product(db, product_id)
+def get_product(product_id: int, request: Request, db: Session = Depends(get_db)):
+    version = CatalogService.get_product_version(db, product_id)
+    if version is None:
+        ResponseHandler.not_found_error("Product", product_id)
+    return conditional_response(
+        request, weak_etag("product", version.tag), version.updated_at,
+        lambda: TrustedJSONResponse(ProductOut, ProductService.get_product(db, product_id)))
 
 
 # Create New Product
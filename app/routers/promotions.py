@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, status
+from app.db.database import get_db
+from app.services.pricing import PricingService
+from sqlalchemy.orm import Session
+from app.schemas.promotions import PromotionCreate, PromotionOut, PromotionsOut, TaxRateUpsert, TaxRateOut, TaxRatesOut
+from app.core.security import check_admin_role
+
+
+router = APIRouter(tags=["Promotions"], prefix="/promotions", dependencies=[Depends(check_admin_role)])
+
+
+# Get All Promotions
+@router.get("/", status_code=status.HTTP_200_OK, response_model=PromotionsOut)
+def get_all_promotions(db: Session = Depends(get_db)):
+    return PricingService.get_all_promotions(db)
+
+
+# Create New Promotion
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=PromotionOut)
+def create_promotion(promotion: PromotionCreate, db: Session = Depends(get_db)):
+    return PricingService.create_promotion(db, promotion)
+
+
+# Get All Tax Rates
+@router.get("/tax-rates", status_code=status.HTTP_200_OK, response_model=TaxRatesOut)
+def get_tax_rates(db: Session = Depends(get_db)):
+    return PricingService.get_tax_rates(db)
+
+
+# Create Or Update Regional Tax Rate
+@router.put("/tax-rates", status_code=status.HTTP_200_OK, response_model=TaxRateOut)
+def upsert_tax_rate(tax_rate: TaxRateUpsert, db: Session = Depends(get_db)):
+    return PricingService.upsert_tax_rate(db, tax_rate)
+
+
+# Delete Promotion By ID
+@router.delete("/{promotion_id}", status_code=status.HTTP_200_OK, response_model=PromotionOut)
+def delete_promotion(promotion_id: int, db: Session = Depends(get_db)):
+    return PricingService.delete_promotion(db, promotion_id)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Query, status, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.services.reviews import ReviewService
-from app.schemas.products import ReviewCreate, ReviewOut
+from app.schemas.products import ReviewCreate, ReviewOut, ReviewsOut, ProductReviewsOut
 from app.core.security import get_current_user
 from app.models.models import User
 from typing import List
+from datetime import datetime
 
 router = APIRouter(tags=["Reviews"], prefix="/reviews")
 
@@ -17,21 +19,51 @@ async def create_review(
 ):
     return await ReviewService.create_review(db, review, current_user.id)
 
-@router.get("/", status_code=status.HTTP_200_OK, response_model=List[ReviewOut])
+@router.get("/", status_code=status.HTTP_200_OK, response_model=ReviewsOut)
 async def get_all_reviews(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=500, description="Reviews per page"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    product_id: int | None = Query(None, description="Filter by product"),
+    user_id: int | None = Query(None, description="Filter by reviewer"),
+    rating: int | None = Query(None, ge=1, le=5, description="Filter by rating"),
+    created_from: datetime | None = Query(None, description="Reviews created at or after"),
+    created_to: datetime | None = Query(None, description="Reviews created before"),
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view all reviews.")
-    return await ReviewService.get_all_reviews(db)
+    return await ReviewService.get_all_reviews(
+        db, limit, cursor,
+        product_id=product_id, user_id=user_id, rating=rating, created_from=created_from, created_to=created_to)
 
-@router.get("/product/{product_id}", status_code=status.HTTP_200_OK, response_model=List[ReviewOut])
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_reviews(
+    current_user: User = Depends(get_current_user),
+    product_id: int | None = Query(None, description="Filter by product"),
+    user_id: int | None = Query(None, description="Filter by reviewer"),
+    rating: int | None = Query(None, ge=1, le=5, description="Filter by rating"),
+    created_from: datetime | None = Query(None, description="Reviews created at or after"),
+    created_to: datetime | None = Query(None, description="Reviews created before"),
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can export reviews.")
+    return StreamingResponse(
+        ReviewService.export_reviews(
+            product_id=product_id, user_id=user_id, rating=rating, created_from=created_from, created_to=created_to),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="reviews.ndjson"'})
+
+@router.get("/product/{product_id}", status_code=status.HTTP_200_OK, response_model=ProductReviewsOut)
 async def get_reviews_for_product(
     product_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    limit: int = Query(10, ge=1, le=100, description="Reviews per page"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    sort: str = Query("newest", enum=["newest", "highest", "lowest"], description="Sort order"),
+    stars: int | None = Query(None, ge=1, le=5, description="Only reviews with this rating"),
 ):
-    return await ReviewService.get_reviews_for_product(db, product_id)
+    return await ReviewService.get_reviews_for_product(db, product_id, limit, cursor, sort, stars)
 
 @router.get("/user/{user_id}", status_code=status.HTTP_200_OK, response_model=List[ReviewOut])
 async def get_reviews_by_user(
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, Query, status
 from app.db.database import get_db
-from app.services.users import UserService
+from app.services.users import UserService, PROFILE_FIELDS
 from sqlalchemy.orm import Session
-from app.schemas.users import UserCreate, UserOut, UsersOut, UserOutDelete, UserUpdate, AdminOut
-from app.core.security import get_current_user, check_admin_role
+from app.schemas.users import UserBase, UserCreate, UserOut, UsersOut, UserOutDelete, UserUpdate, AdminOut
+from app.core.security import get_current_user, get_token_user_id, check_admin_role
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from app.models.models import User
 from app.utils.responses import ResponseHandler
+from app.utils.serialization import TrustedJSONResponse, load_options, parse_fieldset
 
 
 router = APIRouter(tags=["Users"], prefix="/users")
@@ -25,30 +26,46 @@ def get_all_users(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
     search: str | None = Query("", description="Search based username"),
-    role: str = Query("user", enum=["user", "admin"])
+    role: str = Query("user", enum=["user", "admin"]),
+    fields: str | None = Query(None, description="Comma separated fields of each user, e.g. id,username,email"),
+    expand: str | None = Query(None, description="Comma separated relationships to embed: carts"),
 ):
-    users = UserService.get_all_users(db, page, limit, search, role)
-    return {"message": f"Page {page} with {limit} users", "data": users}
+    fieldset = parse_fieldset(UserBase, fields, expand)
+    users = UserService.get_all_users(db, page, limit, search, role, fieldset)
+    return TrustedJSONResponse(UsersOut, {"message": f"Page {page} with {limit} users", "data": users}, fields=fieldset)
 
 
 # Get Current User Profile
 @router.get("/me", status_code=status.HTTP_200_OK, response_model=UserOut)
 def get_current_user_profile(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    expand: str | None = Query(None, description="carts to embed the user's carts with their items"),
+    user_id: int = Depends(get_token_user_id)
 ):
-    user = UserService.get_user(db, current_user.id)
-    return ResponseHandler.success("Successfully retrieved current user", user)
+    message = "Successfully retrieved current user"
+    if expand:
+        fieldset = parse_fieldset(UserBase, None, expand)
+        user = db.query(User).options(*load_options(User, UserBase, fieldset)).filter(User.id == user_id).first()
+        if user is None:
+            raise ResponseHandler.invalid_token('access')
+        return TrustedJSONResponse(UserOut, ResponseHandler.success(message, user), fields=fieldset)
+    # Served from the cached profile, the cart graph is only loaded on request
+    profile = UserService.get_profile(db, user_id)
+    if profile is None:
+        raise ResponseHandler.invalid_token('access')
+    return TrustedJSONResponse(UserOut, ResponseHandler.success(message, profile), fields=PROFILE_FIELDS)
 
 
 # Get Current Admin Profile
 @router.get("/admin/me", status_code=status.HTTP_200_OK, response_model=AdminOut, dependencies=[Depends(check_admin_role)])
 def get_current_admin_profile(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    user_id: int = Depends(get_token_user_id)
 ):
-    user = UserService.get_user(db, current_user.id)
-    return ResponseHandler.success("Successfully retrieved current admin", user)
+    profile = UserService.get_profile(db, user_id)
+    if profile is None:
+        raise ResponseHandler.invalid_token('access')
+    return TrustedJSONResponse(AdminOut, ResponseHandler.success("Successfully retrieved current admin", profile))
 
 
 # Get User By ID
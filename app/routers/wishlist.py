@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.services.wishlist import WishlistService
 from app.core.security import get_current_user
-from app.schemas.wishlist import WishlistOut
+from app.schemas.wishlist import WishlistOut, WishlistBulkUpdate
 from app.models.models import User
 
 router = APIRouter(tags=["Wishlist"], prefix="/wishlist")
@@ -19,6 +19,18 @@ def add_to_wishlist(product_id: int = Body(..., embed=True), db: Session = Depen
     return WishlistService.add_to_wishlist(db, current_user.id, product_id)
 
 
+# Add Many Products
+@router.post("/bulk", status_code=status.HTTP_200_OK)
+def bulk_add_to_wishlist(bulk_update: WishlistBulkUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return WishlistService.bulk_add(db, current_user.id, bulk_update.product_ids)
+
+
+# Remove Many Products
+@router.delete("/bulk", status_code=status.HTTP_200_OK)
+def bulk_remove_from_wishlist(bulk_update: WishlistBulkUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return WishlistService.bulk_remove(db, current_user.id, bulk_update.product_ids)
+
+
 @router.delete("/{product_id}", status_code=status.HTTP_200_OK)
 def remove_from_wishlist(product_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     return WishlistService.remove_from_wishlist(db, current_user.id, product_id)
@@ -0,0 +1,61 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+
+class BaseConfig:
+    from_attributes = True
+
+
+class SalesSummary(BaseModel):
+    start: date
+    end: date
+    order_count: int
+    items_sold: int
+    revenue: float
+    average_order_value: float
+
+
+class SalesSummaryOut(BaseModel):
+    message: str
+    data: SalesSummary
+
+
+class SalesDay(BaseModel):
+    day: date
+    order_count: int
+    items_sold: int
+    revenue: float
+
+    class Config(BaseConfig):
+        pass
+
+
+class SalesDaysOut(BaseModel):
+    message: str
+    data: List[SalesDay]
+
+
+class ProductSales(BaseModel):
+    product_id: int
+    title: Optional[str] = None
+    quantity: int
+    order_count: int
+    revenue: float
+
+
+class ProductSalesOut(BaseModel):
+    message: str
+    data: List[ProductSales]
+
+
+class CategorySales(BaseModel):
+    category_id: int
+    name: Optional[str] = None
+    quantity: int
+    revenue: float
+
+
+class CategorySalesOut(BaseModel):
+    message: str
+    data: List[CategorySales]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from app.schemas.products import ProductBase, CategoryBase
 
@@ -94,3 +94,26 @@ class CartCreate(BaseModel):
 # Update Cart
 class CartUpdate(CartCreate):
     pass
+
+
+# Guest Cart
+class GuestCartItem(BaseModel):
+    product_id: int
+    title: str
+    thumbnail: Optional[str] = None
+    quantity: int
+    unit_price: float
+    subtotal: float
+
+
+class GuestCartBase(BaseModel):
+    token: str
+    price_version: str
+    prices_changed: bool
+    total_amount: float
+    cart_items: List[GuestCartItem]
+
+
+class GuestCartOut(BaseModel):
+    message: str
+    data: GuestCartBase
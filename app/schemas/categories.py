@@ -10,6 +10,8 @@ class CategoryBase(BaseModel):
     id: int
     name: str
     thumbnail: Optional[str] = None
+    parent_id: Optional[int] = None
+    path: Optional[str] = None
 
     class Config(BaseConfig):
         pass
@@ -35,6 +37,29 @@ class CategoriesOut(BaseModel):
     data: List[CategoryBase]
 
 
+class CategoryMenuItem(BaseModel):
+    id: int
+    name: str
+    thumbnail: Optional[str] = None
+    parent_id: Optional[int] = None
+    product_count: int
+    in_stock_count: int
+
+
+class CategoryMenuOut(BaseModel):
+    message: str
+    data: List[CategoryMenuItem]
+
+
+class CategoryTreeNode(CategoryMenuItem):
+    children: List["CategoryTreeNode"] = []
+
+
+class CategoryTreeOut(BaseModel):
+    message: str
+    data: List[CategoryTreeNode]
+
+
 class CategoryDelete(BaseModel):
     id: int
     name: str
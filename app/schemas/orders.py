@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from app.schemas.products import ProductBase
 
 class BaseConfig:
@@ -28,6 +28,8 @@ class OrderBase(BaseModel):
 class OrderCreate(BaseModel):
     address: str
     payment_method: str
+    coupon_code: Optional[str] = None
+    region: Optional[str] = None
 
 class OrderOut(BaseModel):
     message: str
@@ -39,6 +41,67 @@ class OrderOut(BaseModel):
 class OrdersOut(BaseModel):
     message: str
     data: List[OrderBase]
+    next_cursor: Optional[str] = None
 
     class Config(BaseConfig):
         pass
+
+
+# Lightweight listing without the nested product payload
+class OrderSummary(BaseModel):
+    id: int
+    user_id: int
+    total_amount: float
+    status: str
+    created_at: datetime
+    payment_method: Optional[str] = None
+    item_count: int
+
+    class Config(BaseConfig):
+        pass
+
+
+class OrderSummariesOut(BaseModel):
+    message: str
+    data: List[OrderSummary]
+    next_cursor: Optional[str] = None
+
+    class Config(BaseConfig):
+        pass
+
+
+# Bulk Status Update
+class OrderStatusFilter(BaseModel):
+    status: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+
+class BulkOrderStatusUpdate(BaseModel):
+    target_status: str
+    order_ids: Optional[List[int]] = Field(None, max_length=50000)
+    filter: Optional[OrderStatusFilter] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.order_ids is None) == (self.filter is None):
+            raise ValueError("Provide either order_ids or filter")
+        return self
+
+
+class BulkOrderStatusResult(BaseModel):
+    order_id: int
+    previous_status: Optional[str] = None
+    updated: bool
+    reason: Optional[str] = None
+
+
+class BulkOrderStatusData(BaseModel):
+    updated: int
+    skipped: int
+    results: List[BulkOrderStatusResult]
+
+
+class BulkOrderStatusOut(BaseModel):
+    message: str
+    data: BulkOrderStatusData
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, Field, validator
 from datetime import datetime
-from typing import List, Optional, ClassVar
+from typing import Dict, List, Optional, ClassVar
 from app.schemas.categories import CategoryBase
 
 
@@ -78,7 +78,9 @@ class ProductUpdate(BaseModel):
 
 # Get Products
 class ProductOut(ProductBase):
-    pass
+    # Only set when requested with include=wishlisted,in_cart
+    wishlisted: Optional[bool] = None
+    in_cart: Optional[bool] = None
 
 
 class ProductsOut(BaseModel):
@@ -113,6 +115,7 @@ class ReviewBase(BaseModel):
     comment: Optional[str] = None
 
 class ReviewCreate(ReviewBase):
+    rating: int = Field(..., ge=1, le=5)
     product_id: int
 
 class ReviewOut(ReviewBase):
@@ -123,3 +126,40 @@ class ReviewOut(ReviewBase):
 
     class Config(BaseConfig):
         pass
+
+
+class ReviewsOut(BaseModel):
+    message: str
+    data: List[ReviewOut]
+    next_cursor: Optional[str] = None
+
+    class Config(BaseConfig):
+        pass
+
+
+# Product Reviews Page
+class ProductReviewOut(ReviewBase):
+    id: int
+    user_id: int
+    product_id: int
+    created_at: datetime
+
+    class Config(BaseConfig):
+        pass
+
+
+class ReviewSummary(BaseModel):
+    product_id: int
+    review_count: int
+    average_rating: float
+    histogram: Dict[int, int]
+
+
+class ProductReviewsOut(BaseModel):
+    message: str
+    data: List[ProductReviewOut]
+    summary: ReviewSummary
+    next_cursor: Optional[str] = None
+
+    class Config(BaseConfig):
+        pass
@@ -0,0 +1,72 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Literal, Optional
+
+
+class BaseConfig:
+    from_attributes = True
+
+
+class PromotionBase(BaseModel):
+    id: int
+    name: str
+    kind: str
+    coupon_code: Optional[str] = None
+    discount_percentage: float
+    product_id: Optional[int] = None
+    category_id: Optional[int] = None
+    min_quantity: int
+    min_subtotal: float
+    bundle_product_ids: Optional[List[int]] = None
+    is_active: bool
+    created_at: datetime
+
+    class Config(BaseConfig):
+        pass
+
+
+class PromotionCreate(BaseModel):
+    name: str
+    kind: Literal["coupon", "tiered", "bundle"]
+    coupon_code: Optional[str] = None
+    discount_percentage: float = Field(gt=0, le=100)
+    product_id: Optional[int] = None
+    category_id: Optional[int] = None
+    min_quantity: int = Field(1, ge=1)
+    min_subtotal: float = Field(0.0, ge=0)
+    bundle_product_ids: Optional[List[int]] = None
+    is_active: bool = True
+
+
+class PromotionOut(BaseModel):
+    message: str
+    data: PromotionBase
+
+
+class PromotionsOut(BaseModel):
+    message: str
+    data: List[PromotionBase]
+
+
+class TaxRateBase(BaseModel):
+    id: int
+    region: str
+    rate: float
+
+    class Config(BaseConfig):
+        pass
+
+
+class TaxRateUpsert(BaseModel):
+    region: str
+    rate: float = Field(ge=0, le=1)
+
+
+class TaxRateOut(BaseModel):
+    message: str
+    data: TaxRateBase
+
+
+class TaxRatesOut(BaseModel):
+    message: str
+    data: List[TaxRateBase]
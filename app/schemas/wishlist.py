@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.schemas.products import ProductOut
 
 class WishlistOut(BaseModel):
@@ -8,3 +8,7 @@ class WishlistOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class WishlistBulkUpdate(BaseModel):
+    product_ids: list[int] = Field(..., min_length=1, max_length=500)
@@ -0,0 +1,230 @@
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import delete, distinct, func, insert as sql_insert, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.models import (
+    Category, Order, OrderItem, Product, SalesDaily, SalesDailyCategory, SalesDailyProduct
+)
+from app.utils.responses import ResponseHandler
+
+
+# Orders in these statuses don't count towards sales
+EXCLUDED_STATUSES = ("cancelled",)
+
+
+def sales_day(created_at: datetime) -> date:
+    return created_at.astimezone(timezone.utc).date()
+
+
+class _Rollups:
+    """Deltas for the rollup tables, merged per key so each table gets one upsert statement."""
+
+    def __init__(self):
+        self.daily = {}
+        self.products = {}
+        self.categories = {}
+        self._product_orders = set()
+
+    def add_order(self, day: date, total_amount: float, sign: int):
+        daily = self.daily.setdefault(day, [0, 0, 0.0])
+        daily[0] += sign
+        daily[2] += total_amount * sign
+
+    def add_line(self, day: date, product_id: int, category_id: int, quantity: int, subtotal: float, sign: int, order_id=None):
+        self.daily.setdefault(day, [0, 0, 0.0])[1] += quantity * sign
+        product = self.products.setdefault((day, product_id), [0, 0, 0.0])
+        # An order with the same product on two lines still counts as one order for it
+        if (order_id, product_id) not in self._product_orders:
+            self._product_orders.add((order_id, product_id))
+            product[0] += sign
+        product[1] += quantity * sign
+        product[2] += subtotal * sign
+        category = self.categories.setdefault((day, category_id), [0, 0.0])
+        category[0] += quantity * sign
+        category[1] += subtotal * sign
+
+    def apply(self, db: Session):
+        if self.daily:
+            AnalyticsService._upsert(db, SalesDaily, ["day"], [
+                {"day": day, "order_count": orders, "items_sold": items, "revenue": revenue}
+                for day, (orders, items, revenue) in self.daily.items()
+            ])
+        if self.products:
+            AnalyticsService._upsert(db, SalesDailyProduct, ["day", "product_id"], [
+                {"day": day, "product_id": product_id, "order_count": orders, "quantity": quantity, "revenue": revenue}
+                for (day, product_id), (orders, quantity, revenue) in self.products.items()
+            ])
+        if self.categories:
+            AnalyticsService._upsert(db, SalesDailyCategory, ["day", "category_id"], [
+                {"day": day, "category_id": category_id, "quantity": quantity, "revenue": revenue}
+                for (day, category_id), (quantity, revenue) in self.categories.items()
+            ])
+
+
+class AnalyticsService:
+    # Add (sign=1) or remove (sign=-1) one order from the rollups, inside the caller's transaction.
+    # Lines are (product_id, category_id, quantity, subtotal) tuples.
+    @staticmethod
+    def record_order(db: Session, day: date, total_amount: float, lines, sign: int = 1):
+        rollups = _Rollups()
+        rollups.add_order(day, total_amount, sign)
+        for product_id, category_id, quantity, subtotal in lines:
+            rollups.add_line(day, product_id, category_id, quantity, subtotal, sign)
+        rollups.apply(db)
+
+    # Job: add a checked out order to the rollups, committed together with the job by the worker.
+    # The payload carries the lines, so an order cancelled or deleted meanwhile still nets out.
+    @staticmethod
+    def record_order_job(db: Session, payload: dict):
+        AnalyticsService.record_order(db, date.fromisoformat(payload["day"]), payload["total_amount"], payload["lines"])
+
+    # Add or remove orders that are already stored, loading all their lines with one query
+    @staticmethod
+    def record_existing_orders(db: Session, order_ids, sign: int):
+        order_ids = list(order_ids)
+        if not order_ids:
+            return
+        rollups = _Rollups()
+        for order in db.execute(select(Order.created_at, Order.total_amount).where(Order.id.in_(order_ids))):
+            rollups.add_order(sales_day(order.created_at), order.total_amount, sign)
+        lines = db.execute(
+            select(Order.id, Order.created_at, OrderItem.product_id, Product.category_id, OrderItem.quantity, OrderItem.subtotal)
+            .join(OrderItem, (OrderItem.order_id == Order.id) & (OrderItem.order_created_at == Order.created_at))
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(Order.id.in_(order_ids))
+        )
+        for line in lines:
+            rollups.add_line(sales_day(line.created_at), line.product_id, line.category_id, line.quantity, line.subtotal, sign, line.id)
+        rollups.apply(db)
+
+    @staticmethod
+    def record_existing_order(db: Session, order: Order, sign: int):
+        AnalyticsService.record_existing_orders(db, [order.id], sign)
+
+    @staticmethod
+    def _upsert(db: Session, model, keys: list[str], rows: list[dict]):
+        stmt = insert(model).values(rows)
+        counters = {
+            column.name: getattr(model, column.name) + stmt.excluded[column.name]
+            for column in model.__table__.columns if column.name not in keys
+        }
+        db.execute(stmt.on_conflict_do_update(index_elements=keys, set_=counters))
+
+    # Rebuild the rollups for a date range from orders/order_items with set-based INSERT ... SELECT
+    @staticmethod
+    def backfill(db: Session, start: date | None = None, end: date | None = None):
+        day = func.date(func.timezone("UTC", Order.created_at))
+        order_filters = [Order.status.notin_(EXCLUDED_STATUSES)]
+        if start:
+            order_filters.append(day >= start)
+        if end:
+            order_filters.append(day < end)
+
+        for model in (SalesDaily, SalesDailyProduct, SalesDailyCategory):
+            rollup = delete(model)
+            if start:
+                rollup = rollup.where(model.day >= start)
+            if end:
+                rollup = rollup.where(model.day < end)
+            db.execute(rollup)
+
+        items_per_order = (
+            select(OrderItem.order_id, OrderItem.order_created_at, func.sum(OrderItem.quantity).label("quantity"))
+            .group_by(OrderItem.order_id, OrderItem.order_created_at)
+            .subquery()
+        )
+        db.execute(sql_insert(SalesDaily).from_select(
+            ["day", "order_count", "items_sold", "revenue"],
+            select(day, func.count(Order.id), func.coalesce(func.sum(items_per_order.c.quantity), 0), func.sum(Order.total_amount))
+            .outerjoin(items_per_order, (items_per_order.c.order_id == Order.id) & (items_per_order.c.order_created_at == Order.created_at))
+            .where(*order_filters)
+            .group_by(day)
+        ))
+        db.execute(sql_insert(SalesDailyProduct).from_select(
+            ["day", "product_id", "order_count", "quantity", "revenue"],
+            select(day, OrderItem.product_id, func.count(distinct(Order.id)), func.sum(OrderItem.quantity), func.sum(OrderItem.subtotal))
+            .join(Order, (Order.id == OrderItem.order_id) & (Order.created_at == OrderItem.order_created_at))
+            .where(*order_filters)
+            .group_by(day, OrderItem.product_id)
+        ))
+        db.execute(sql_insert(SalesDailyCategory).from_select(
+            ["day", "category_id", "quantity", "revenue"],
+            select(day, Product.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.subtotal))
+            .join(Order, (Order.id == OrderItem.order_id) & (Order.created_at == OrderItem.order_created_at))
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(*order_filters)
+            .group_by(day, Product.category_id)
+        ))
+        db.commit()
+
+    @staticmethod
+    def get_range(start: date | None, end: date | None):
+        end = end or datetime.now(timezone.utc).date() + timedelta(days=1)
+        start = start or end - timedelta(days=30)
+        if start >= end:
+            ResponseHandler.bad_request_error("start must be before end")
+        return start, end
+
+    @staticmethod
+    def get_summary(db: Session, start: date | None, end: date | None):
+        start, end = AnalyticsService.get_range(start, end)
+        order_count, items_sold, revenue = db.execute(
+            select(
+                func.coalesce(func.sum(SalesDaily.order_count), 0),
+                func.coalesce(func.sum(SalesDaily.items_sold), 0),
+                func.coalesce(func.sum(SalesDaily.revenue), 0.0),
+            ).where(SalesDaily.day >= start, SalesDaily.day < end)
+        ).one()
+        data = {
+            "start": start,
+            "end": end,
+            "order_count": order_count,
+            "items_sold": items_sold,
+            "revenue": round(revenue, 2),
+            "average_order_value": round(revenue / order_count, 2) if order_count else 0.0,
+        }
+        return ResponseHandler.success(f"Sales summary from {start} to {end}", data)
+
+    @staticmethod
+    def get_daily(db: Session, start: date | None, end: date | None):
+        start, end = AnalyticsService.get_range(start, end)
+        rows = db.query(SalesDaily).filter(SalesDaily.day >= start, SalesDaily.day < end).order_by(SalesDaily.day.asc()).all()
+        return ResponseHandler.success(f"Daily sales from {start} to {end}", rows)
+
+    @staticmethod
+    def get_top_products(db: Session, start: date | None, end: date | None, limit: int):
+        start, end = AnalyticsService.get_range(start, end)
+        revenue = func.sum(SalesDailyProduct.revenue).label("revenue")
+        rows = db.execute(
+            select(
+                SalesDailyProduct.product_id,
+                Product.title,
+                func.sum(SalesDailyProduct.quantity).label("quantity"),
+                func.sum(SalesDailyProduct.order_count).label("order_count"),
+                revenue,
+            )
+            .outerjoin(Product, Product.id == SalesDailyProduct.product_id)
+            .where(SalesDailyProduct.day >= start, SalesDailyProduct.day < end)
+            .group_by(SalesDailyProduct.product_id, Product.title)
+            .order_by(revenue.desc())
+            .limit(limit)
+        ).all()
+        return ResponseHandler.success(f"Top {limit} products from {start} to {end}", [dict(row._mapping) for row in rows])
+
+    @staticmethod
+    def get_categories(db: Session, start: date | None, end: date | None):
+        start, end = AnalyticsService.get_range(start, end)
+        revenue = func.sum(SalesDailyCategory.revenue).label("revenue")
+        rows = db.execute(
+            select(
+                SalesDailyCategory.category_id,
+                Category.name,
+                func.sum(SalesDailyCategory.quantity).label("quantity"),
+                revenue,
+            )
+            .outerjoin(Category, Category.id == SalesDailyCategory.category_id)
+            .where(SalesDailyCategory.day >= start, SalesDailyCategory.day < end)
+            .group_by(SalesDailyCategory.category_id, Category.name)
+            .order_by(revenue.desc())
+        ).all()
+        return ResponseHandler.success(f"Category sales from {start} to {end}", [dict(row._mapping) for row in rows])
@@ -3,7 +3,8 @@ from fastapi.security.oauth2 import OAuth2PasswordBearer, OAuth2PasswordRequestF
 from sqlalchemy.orm import Session
 from app.models.models import User
 from app.db.database import get_db
-from app.core.security import verify_password, get_user_token, get_password_hash
+from app.core.security import verify_password, get_user_token, get_password_hash, get_token_payload
+from app.services.carts import CartService
 from app.utils.responses import ResponseHandler
 from app.schemas.auth import Signup
 
@@ -13,7 +14,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 class AuthService:
     @staticmethod
-    async def login_for_role(user_credentials: OAuth2PasswordRequestForm, db: Session, required_role: str):
+    async def login_for_role(user_credentials: OAuth2PasswordRequestForm, db: Session, required_role: str, guest_cart: str | None = None):
         user = db.query(User).filter(User.username == user_credentials.username).first()
         if not user:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
@@ -24,18 +25,34 @@ class AuthService:
         if user.role != required_role:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Not authorized as {required_role}")
 
+        if guest_cart:
+            AuthService.merge_guest_cart(db, user.id, guest_cart)
+
         return await get_user_token(user=user)
 
     @staticmethod
-    async def signup(db: Session, user: Signup):
+    async def signup(db: Session, user: Signup, guest_cart: str | None = None):
         hashed_password = get_password_hash(user.password)
         user.password = hashed_password
         db_user = User(id=None, **user.model_dump())
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        if guest_cart:
+            AuthService.merge_guest_cart(db, db_user.id, guest_cart)
+            db.refresh(db_user)
         return ResponseHandler.create_success(db_user.username, db_user.id, db_user)
 
+    # An expired or tampered guest cart cookie only loses the guest cart, authentication still
+    # succeeds and the router clears the cookie
+    @staticmethod
+    def merge_guest_cart(db: Session, user_id: int, guest_cart: str):
+        try:
+            CartService.merge_guest_cart(db, user_id, guest_cart)
+        except HTTPException as e:
+            if e.status_code != status.HTTP_401_UNAUTHORIZED:
+                raise
+
     @staticmethod
     async def get_refresh_token(token, db):
         payload = get_token_payload(token)
@@ -1,9 +1,13 @@
 from sqlalchemy.orm import Session
 from app.models.models import Cart, CartItem, Product
-from app.schemas.carts import CartUpdate, CartCreate
+from app.schemas.carts import CartBase, CartUpdate, CartCreate
 from app.utils.responses import ResponseHandler
+from app.utils.serialization import load_options
 from sqlalchemy.orm import joinedload
-from app.core.security import get_user_from_token
+import hashlib
+from app.core.security import get_user_from_token, create_guest_cart_token, get_guest_cart_payload
+from app.services.catalog import CatalogService
+from app.services.pricing import PricingService
 
 class CartService:
     @staticmethod
@@ -13,9 +17,14 @@ class CartService:
 
     # Get All Carts
     @staticmethod
-    def get_all_carts(token, db: Session, page: int, limit: int):
+    def get_all_carts(token, db: Session, page: int, limit: int, fields: frozenset[str] | None = None):
         user = get_user_from_token(token.credentials, db)
-        carts = db.query(Cart).filter(Cart.user_id == user.id).offset((page - 1) * limit).limit(limit).all()
+        carts = (
+            db.query(Cart)
+            .options(*load_options(Cart, CartBase, fields))
+            .filter(Cart.user_id == user.id)
+            .offset((page - 1) * limit).limit(limit).all()
+        )
         message = f"Page {page} with {limit} carts"
         return ResponseHandler.success(message, carts)
 
@@ -28,33 +37,38 @@ class CartService:
             ResponseHandler.not_found_error("Cart", cart_id)
         return ResponseHandler.get_single_success("cart", cart_id, cart)
 
+    # Load every product referenced by the cart items in one query
+    @staticmethod
+    def get_products_for_items(db: Session, cart_items):
+        product_ids = {item.product_id for item in cart_items}
+        products = {product.id: product for product in db.query(Product).filter(Product.id.in_(product_ids)).all()}
+        for product_id in product_ids:
+            if product_id not in products:
+                ResponseHandler.not_found_error("Product", product_id)
+        return products
+
+    # Price cart items through the compiled promotion plan
+    @staticmethod
+    def price_cart_items(db: Session, cart_items):
+        for item in cart_items:
+            if item.quantity <= 0:
+                ResponseHandler.bad_request_error("Quantity must be greater than zero.")
+
+        products = CartService.get_products_for_items(db, cart_items)
+        engine = PricingService.get_engine(db)
+        return engine.price_cart([(item.product_id, item.quantity) for item in cart_items], products)
+
     # Create a new Cart
     @staticmethod
     def create_cart(token, db: Session, cart: CartCreate):
         user = get_user_from_token(token.credentials, db)
-        cart_dict = cart.model_dump()
-
-        cart_items_data = cart_dict.pop("cart_items", [])
-        cart_items = []
-        total_amount = 0
-        for item_data in cart_items_data:
-            product_id = item_data['product_id']
-            quantity = item_data['quantity']
-            if quantity <= 10:
-                return ResponseHandler.validation_error("Quantity must be lesser that stock than zero.")
-
-            product = db.query(Product).filter(Product.id == product_id).first()
-            if not product:
-                return ResponseHandler.not_found_error("Product", product_id)
-
-            # Calculate discounted price
-            discounted_price = product.price * (1 - product.discount_percentage / 100)
-            subtotal = quantity * discounted_price
-            cart_item = CartItem(product_id=product_id, quantity=quantity, subtotal=subtotal)
-            total_amount += subtotal
-
-            cart_items.append(cart_item)
-        cart_db = Cart(cart_items=cart_items, user_id=user.id, total_amount=total_amount, **cart_dict)
+        priced = CartService.price_cart_items(db, cart.cart_items)
+
+        cart_items = [
+            CartItem(product_id=line.product_id, quantity=line.quantity, subtotal=line.subtotal)
+            for line in priced.lines
+        ]
+        cart_db = Cart(cart_items=cart_items, user_id=user.id, total_amount=priced.subtotal)
         db.add(cart_db)
         db.commit()
         db.refresh(cart_db)
@@ -69,32 +83,16 @@ class CartService:
         if not cart:
             return ResponseHandler.not_found_error("Cart", cart_id)
 
+        priced = CartService.price_cart_items(db, updated_cart.cart_items)
+
         # Delete existing cart_items
         db.query(CartItem).filter(CartItem.cart_id == cart_id).delete()
 
-        total_amount = 0
-        for item in updated_cart.cart_items:
-            product_id = item.product_id
-            quantity = item.quantity
-
-            product = db.query(Product).filter(Product.id == product_id).first()
-            if not product:
-                return ResponseHandler.not_found_error("Product", product_id)
-
-            # Calculate discounted price
-            discounted_price = product.price * (1 - product.discount_percentage / 100)
-            subtotal = quantity * discounted_price
-
-            cart_item = CartItem(
-                cart_id=cart_id,
-                product_id=product_id,
-                quantity=quantity,
-                subtotal=subtotal
-            )
-            db.add(cart_item)
-            total_amount += subtotal
-
-        cart.total_amount = total_amount
+        db.add_all([
+            CartItem(cart_id=cart_id, product_id=line.product_id, quantity=line.quantity, subtotal=line.subtotal)
+            for line in priced.lines
+        ])
+        cart.total_amount = priced.subtotal
 
         db.commit()
         db.refresh(cart)
@@ -119,3 +117,104 @@ class CartService:
         db.delete(cart)
         db.commit()
         return ResponseHandler.delete_success("Cart", cart_id, cart)
+
+    # Merge a guest cart token into the user's cart with one batched insert
+    @staticmethod
+    def merge_guest_cart(db: Session, user_id: int, token: str):
+        guest_items, _ = get_guest_cart_payload(token)
+        if not guest_items:
+            return None
+
+        cart = CartService.get_cart_by_user_id(db, user_id)
+        quantities = {}
+        if cart:
+            for item in cart.cart_items:
+                quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+        for product_id, quantity in guest_items:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        # Products removed from the catalog since the guest added them are dropped silently
+        products = {product.id: product for product in db.query(Product).filter(Product.id.in_(quantities)).all()}
+        items = [(product_id, quantity) for product_id, quantity in quantities.items() if product_id in products]
+        priced = PricingService.get_engine(db).price_cart(items, products)
+
+        if cart:
+            db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+            cart.total_amount = priced.subtotal
+        else:
+            cart = Cart(user_id=user_id, total_amount=priced.subtotal)
+            db.add(cart)
+            db.flush()
+
+        db.add_all([
+            CartItem(cart_id=cart.id, product_id=line.product_id, quantity=line.quantity, subtotal=line.subtotal)
+            for line in priced.lines
+        ])
+        db.commit()
+        return cart
+
+
+class GuestCartService:
+    # Price a guest cart from the catalog cache, never touching the carts tables
+    @staticmethod
+    def price_guest_items(db: Session, items: list[tuple[int, int]]):
+        products = CatalogService.get_products(db, (product_id for product_id, _ in items))
+        items = [(product_id, quantity) for product_id, quantity in items if product_id in products]
+        priced = PricingService.get_engine(db).price_cart(items, products)
+        return priced, products
+
+    @staticmethod
+    def get_price_version(priced) -> str:
+        digest = hashlib.blake2b(digest_size=6)
+        for line in priced.lines:
+            digest.update(f"{line.product_id}:{line.unit_price};".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def build_guest_cart(priced, products, token: str, prices_changed: bool = False):
+        cart_items = [
+            {
+                "product_id": line.product_id,
+                "title": products[line.product_id].title,
+                "thumbnail": products[line.product_id].thumbnail,
+                "quantity": line.quantity,
+                "unit_price": line.unit_price,
+                "subtotal": line.subtotal,
+            }
+            for line in priced.lines
+        ]
+        return {
+            "token": token,
+            "price_version": GuestCartService.get_price_version(priced),
+            "prices_changed": prices_changed,
+            "total_amount": priced.subtotal,
+            "cart_items": cart_items,
+        }
+
+    # Get Guest Cart
+    @staticmethod
+    def get_guest_cart(db: Session, token: str | None):
+        items, price_version = get_guest_cart_payload(token) if token else ([], None)
+        priced, products = GuestCartService.price_guest_items(db, items)
+        prices_changed = price_version is not None and price_version != GuestCartService.get_price_version(priced)
+        data = GuestCartService.build_guest_cart(priced, products, token or "", prices_changed)
+        return ResponseHandler.success("Guest cart", data)
+
+    # Replace Guest Cart Items And Issue A New Token
+    @staticmethod
+    def update_guest_cart(db: Session, updated_cart: CartUpdate):
+        quantities = {}
+        for item in updated_cart.cart_items:
+            if item.quantity <= 0:
+                ResponseHandler.bad_request_error("Quantity must be greater than zero.")
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+        priced, products = GuestCartService.price_guest_items(db, list(quantities.items()))
+        for product_id in quantities:
+            if product_id not in products:
+                ResponseHandler.not_found_error("Product", product_id)
+
+        items = [(line.product_id, line.quantity) for line in priced.lines]
+        token = create_guest_cart_token(items, GuestCartService.get_price_version(priced))
+        data = GuestCartService.build_guest_cart(priced, products, token)
+        return ResponseHandler.success("Guest cart updated", data)
@@ -0,0 +1,156 @@
+from datetime import datetime
+from typing import Callable, NamedTuple
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from app.core.compression import CompressibleBody
+from app.core.config import settings
+from app.models.models import Category, Product
+from app.utils.cache import TTLCache
+
+
+class ProductSnapshot(NamedTuple):
+    id: int
+    title: str
+    thumbnail: str | None
+    price: float
+    discount_percentage: float
+    category_id: int
+    is_available: bool
+
+
+class CatalogVersion(NamedTuple):
+    updated_at: datetime | None
+    tag: str
+
+
+class CatalogService:
+    _products = TTLCache(settings.catalog_cache_ttl_seconds)
+    _category_menu = TTLCache(settings.catalog_cache_ttl_seconds, maxsize=8)
+    _version = TTLCache(settings.catalog_version_ttl_seconds, maxsize=1)
+
+    # Get price snapshots for products, only cache misses hit the database
+    @staticmethod
+    def get_products(db: Session, product_ids) -> dict[int, ProductSnapshot]:
+        product_ids = set(product_ids)
+        snapshots = CatalogService._products.get_many(product_ids)
+        missing = product_ids - snapshots.keys()
+        if missing:
+            rows = db.query(
+                Product.id, Product.title, Product.thumbnail, Product.price,
+                Product.discount_percentage, Product.category_id, Product.is_available,
+            ).filter(Product.id.in_(missing)).all()
+            loaded = {row.id: ProductSnapshot(*row) for row in rows}
+            CatalogService._products.set_many(loaded)
+            snapshots.update(loaded)
+        return snapshots
+
+    # Every category with its published and in-stock product counts, from one GROUP BY shared by all requests
+    @staticmethod
+    def get_category_menu(db: Session) -> list[dict]:
+        menu = CatalogService._category_menu.get("menu")
+        if menu is None:
+            counts = (
+                select(
+                    Product.category_id,
+                    func.count(Product.id).label("product_count"),
+                    func.count(case((Product.is_available & (Product.stock > 0), Product.id))).label("in_stock_count"),
+                )
+                .where(Product.is_published == True)
+                .group_by(Product.category_id)
+                .subquery()
+            )
+            rows = db.execute(
+                select(
+                    Category.id, Category.name, Category.thumbnail, Category.parent_id, Category.path,
+                    func.coalesce(counts.c.product_count, 0).label("product_count"),
+                    func.coalesce(counts.c.in_stock_count, 0).label("in_stock_count"),
+                )
+                .outerjoin(counts, counts.c.category_id == Category.id)
+                .order_by(Category.name.asc())
+            ).all()
+            menu = [dict(row._mapping) for row in rows]
+            CatalogService._category_menu.set("menu", menu)
+        return menu
+
+    # The menu as nested nodes, counts of a node include its whole subtree
+    @staticmethod
+    def get_category_tree(db: Session) -> list[dict]:
+        tree = CatalogService._category_menu.get("tree")
+        if tree is None:
+            # Ordering by path puts every parent before its children
+            nodes = {}
+            for category in sorted(CatalogService.get_category_menu(db), key=lambda category: category["path"]):
+                nodes[category["id"]] = {**category, "children": []}
+            tree = []
+            for node in nodes.values():
+                parent = nodes.get(node["parent_id"])
+                (parent["children"] if parent else tree).append(node)
+            for node in sorted(nodes.values(), key=lambda node: node["path"].count("/"), reverse=True):
+                node["children"].sort(key=lambda child: child["name"])
+                parent = nodes.get(node["parent_id"])
+                if parent:
+                    parent["product_count"] += node["product_count"]
+                    parent["in_stock_count"] += node["in_stock_count"]
+            tree.sort(key=lambda node: node["name"])
+            CatalogService._category_menu.set("tree", tree)
+        return tree
+
+    # Validators of everything the catalog endpoints return, from one query on the updated_at indexes.
+    # The counts catch deletes, which leave no newer updated_at behind.
+    @staticmethod
+    def get_catalog_version(db: Session) -> CatalogVersion:
+        """Validators of the product and category listings. The counts catch deletions, which
+        leave max(updated_at) alone, but cost an index scan of both tables. The version is
+        therefore cached per process for catalog_version_ttl_seconds and dropped by local
+        catalog writes. Stock is part of the listings, so a checkout changes the version too."""
+        version = CatalogService._version.get("catalog")
+        if version is not None:
+            return version
+        products_updated_at, product_count, categories_updated_at, category_count = db.execute(select(
+            select(func.max(Product.updated_at)).scalar_subquery(),
+            select(func.count()).select_from(Product).scalar_subquery(),
+            select(func.max(Category.updated_at)).scalar_subquery(),
+            select(func.count()).select_from(Category).scalar_subquery(),
+        )).one()
+        updated_at = max(filter(None, (products_updated_at, categories_updated_at)), default=None)
+        version = CatalogVersion(updated_at, f"{products_updated_at}:{product_count}:{categories_updated_at}:{category_count}")
+        CatalogService._version.set("catalog", version)
+        return version
+
+    @staticmethod
+    def get_product_version(db: Session, product_id: int) -> CatalogVersion | None:
+        row = db.execute(
+            select(Product.updated_at, Category.updated_at)
+            .join(Category, Category.id == Product.category_id)
+            .where(Product.id == product_id)
+        ).first()
+        if row is None:
+            return None
+        return CatalogVersion(max(row), f"{product_id}:{row[0]}:{row[1]}")
+
+    # Rendered responses of the category menus, cached with their compressed variants
+    @staticmethod
+    def get_category_body(key: str, render: Callable[[], bytes]) -> CompressibleBody:
+        body = CatalogService._category_menu.get(key)
+        if body is None:
+            body = CompressibleBody(render())
+            CatalogService._category_menu.set(key, body)
+        return body
+
+    @staticmethod
+    def get_category_path(db: Session, category_id: int) -> str | None:
+        for category in CatalogService.get_category_menu(db):
+            if category["id"] == category_id:
+                return category["path"]
+        return None
+
+    @staticmethod
+    def invalidate_product(product_id: int | None = None):
+        CatalogService._products.invalidate(product_id)
+        CatalogService._category_menu.invalidate()
+        CatalogService._version.invalidate()
+
+    @staticmethod
+    def invalidate_categories():
+        CatalogService._category_menu.invalidate()
+        CatalogService._version.invalidate()
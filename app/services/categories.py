@@ -1,7 +1,10 @@
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 from app.models.models import Category
-from app.schemas.categories import CategoryCreate, CategoryUpdate
+from app.schemas.categories import CategoryCreate, CategoryMenuOut, CategoryTreeOut, CategoryUpdate
 from app.utils.responses import ResponseHandler
+from app.services.catalog import CatalogService
+from app.utils.serialization import dump_json
 from fastapi import UploadFile
 import shutil
 import os
@@ -10,10 +13,27 @@ import os
 class CategoryService:
     @staticmethod
     def get_all_categories(db: Session, page: int, limit: int, search: str = ""):
-        categories = db.query(Category).order_by(Category.id.asc()).filter(
-            Category.name.contains(search)).limit(limit).offset((page - 1) * limit).all()
+        query = db.query(Category)
+        if search:
+            # Case-insensitive substring match, served by the trigram index on name
+            query = query.filter(Category.name.ilike(f"%{search}%"))
+        categories = query.order_by(Category.id.asc()).limit(limit).offset((page - 1) * limit).all()
         return {"message": f"Page {page} with {limit} categories", "data": categories}
 
+    @staticmethod
+    def get_category_menu(db: Session):
+        def render():
+            menu = CatalogService.get_category_menu(db)
+            return dump_json(CategoryMenuOut, ResponseHandler.success(f"{len(menu)} categories", menu))
+        return CatalogService.get_category_body("menu.body", render)
+
+    @staticmethod
+    def get_category_tree(db: Session):
+        def render():
+            tree = CatalogService.get_category_tree(db)
+            return dump_json(CategoryTreeOut, ResponseHandler.success(f"{len(tree)} top level categories", tree))
+        return CatalogService.get_category_body("tree.body", render)
+
     @staticmethod
     def get_category(db: Session, category_id: int):
         category = db.query(Category).filter(Category.id == category_id).first()
@@ -22,24 +42,38 @@ class CategoryService:
         return ResponseHandler.get_single_success(category.name, category_id, category)
 
     @staticmethod
-    def create_category(db: Session, name: str, description: str, thumbnail: UploadFile):
+    def create_category(db: Session, name: str, description: str, thumbnail: UploadFile, parent_id: int | None = None):
+        parent = None
+        if parent_id is not None:
+            parent = db.query(Category).filter(Category.id == parent_id).first()
+            if not parent:
+                ResponseHandler.not_found_error("Category", parent_id)
+
         file_path = f"uploads/{thumbnail.filename}"
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(thumbnail.file, buffer)
         thumbnail_url = f"/uploads/{thumbnail.filename}"
 
-        db_category = Category(name=name, description=description, thumbnail=thumbnail_url)
+        db_category = Category(name=name, description=description, thumbnail=thumbnail_url, parent_id=parent_id, path="")
         db.add(db_category)
+        # The path ends with the category's own id, known once it is inserted
+        db.flush()
+        db_category.path = f"{parent.path if parent else ''}{db_category.id}/"
         db.commit()
         db.refresh(db_category)
+        CatalogService.invalidate_categories()
         return ResponseHandler.create_success(db_category.name, db_category.id, db_category)
 
     @staticmethod
-    def update_category(db: Session, category_id: int, name: str, description: str, thumbnail: UploadFile | None):
+    def update_category(db: Session, category_id: int, name: str, description: str, thumbnail: UploadFile | None, parent_id: int | None = None):
         db_category = db.query(Category).filter(Category.id == category_id).first()
         if not db_category:
             ResponseHandler.not_found_error("Category", category_id)
 
+        # None keeps the category where it is, 0 moves it to the top level
+        if parent_id is not None and parent_id != (db_category.parent_id or 0):
+            CategoryService.move_category(db, db_category, parent_id or None)
+
         db_category.name = name
         db_category.description = description
 
@@ -60,13 +94,40 @@ class CategoryService:
 
         db.commit()
         db.refresh(db_category)
+        CatalogService.invalidate_categories()
         return ResponseHandler.update_success(db_category.name, db_category.id, db_category)
 
+    # Re-parent a category and rewrite the paths of its whole subtree in one UPDATE
+    @staticmethod
+    def move_category(db: Session, db_category: Category, parent_id: int | None):
+        prefix = ""
+        if parent_id is not None:
+            parent = db.query(Category).filter(Category.id == parent_id).first()
+            if not parent:
+                ResponseHandler.not_found_error("Category", parent_id)
+            if parent.path.startswith(db_category.path):
+                ResponseHandler.bad_request_error("A category cannot be moved under itself or its subcategories")
+            prefix = parent.path
+
+        old_path = db_category.path
+        new_path = f"{prefix}{db_category.id}/"
+        db.execute(
+            update(Category)
+            .where(Category.path.like(f"{old_path}%"))
+            .values(path=new_path + func.substr(Category.path, len(old_path) + 1))
+            .execution_options(synchronize_session=False)
+        )
+        db_category.parent_id = parent_id
+        db_category.path = new_path
+
     @staticmethod
     def delete_category(db: Session, category_id: int):
         db_category = db.query(Category).filter(Category.id == category_id).first()
         if not db_category:
             ResponseHandler.not_found_error("Category", category_id)
+        if db.query(Category.id).filter(Category.parent_id == category_id).first():
+            ResponseHandler.bad_request_error("Category has subcategories, move or delete them first")
         db.delete(db_category)
         db.commit()
+        CatalogService.invalidate_categories()
         return ResponseHandler.delete_success(db_category.name, db_category.id, db_category)
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Order, OutboxEvent, Product, User
+from app.utils.responses import ResponseHandler
+from fastapi import HTTPException, status
+
+# Topics clients can subscribe to: every order (admins), one user's orders and one product's stock
+ADMIN_ORDERS_TOPIC = "orders"
+
+
+def user_orders_topic(user_id: int) -> str:
+    return f"orders:user:{user_id}"
+
+
+def product_topic(product_id: int) -> str:
+    return f"products:{product_id}"
+
+
+def order_payload(order_id: int, user_id: int, created_at: datetime, status: str, **extra) -> dict:
+    return {"id": order_id, "user_id": user_id, "created_at": created_at.isoformat(), "status": status, **extra}
+
+
+class EventService:
+    # Map the requested topic names to outbox topics the user may read
+    @staticmethod
+    def resolve_topics(requested: list[str], user: User | None) -> set[str]:
+        topics = set()
+        for name in requested:
+            if name == "orders:me":
+                if user is None:
+                    ResponseHandler.invalid_token('access')
+                topics.add(user_orders_topic(user.id))
+            elif name == ADMIN_ORDERS_TOPIC:
+                if user is None or user.role != "admin":
+                    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+                topics.add(ADMIN_ORDERS_TOPIC)
+            elif name.startswith("products:") and name.split(":", 1)[1].isdigit():
+                topics.add(product_topic(int(name.split(":", 1)[1])))
+            else:
+                ResponseHandler.bad_request_error(f"Unknown topic {name}")
+        if not topics:
+            ResponseHandler.bad_request_error("At least one topic is required")
+        return topics
+
+    # Outbox rows are added to the caller's session and only become visible when it commits
+    @staticmethod
+    def order_changed(db: Session, kind: str, order: Order, **extra):
+        db.add(OutboxEvent(
+            kind=kind,
+            topics=[ADMIN_ORDERS_TOPIC, user_orders_topic(order.user_id)],
+            payload=order_payload(order.id, order.user_id, order.created_at, order.status, total_amount=order.total_amount, **extra),
+        ))
+
+    # Status changes from a set-based update, rows carry id, user_id, created_at and the previous status
+    @staticmethod
+    def orders_status_changed(db: Session, rows, new_status: str):
+        if not rows:
+            return
+        db.execute(insert(OutboxEvent), [
+            {
+                "kind": "order.status",
+                "topics": [ADMIN_ORDERS_TOPIC, user_orders_topic(row.user_id)],
+                "payload": order_payload(row.id, row.user_id, row.created_at, new_status, previous_status=row.status),
+            }
+            for row in rows
+        ])
+
+    # Rows carry id, stock and is_available of the changed products
+    @staticmethod
+    def stock_changed(db: Session, rows):
+        if not rows:
+            return
+        db.execute(insert(OutboxEvent), [
+            {
+                "kind": "product.stock",
+                "topics": [product_topic(row.id)],
+                "payload": {"id": row.id, "stock": row.stock, "is_available": row.is_available},
+            }
+            for row in rows
+        ])
+
+    @staticmethod
+    def get_latest_id(db: Session) -> int:
+        return db.scalar(select(func.coalesce(func.max(OutboxEvent.id), 0)))
+
+    @staticmethod
+    def get_oldest_id(db: Session) -> int | None:
+        return db.scalar(select(func.min(OutboxEvent.id)))
+
+    @staticmethod
+    def get_events_after(db: Session, after_id: int, limit: int, topics: list[str] | None = None) -> list[OutboxEvent]:
+        query = select(OutboxEvent).where(OutboxEvent.id > after_id)
+        if topics is not None:
+            query = query.where(OutboxEvent.topics.overlap(topics))
+        return db.scalars(query.order_by(OutboxEvent.id).limit(limit)).all()
+
+    @staticmethod
+    def purge(db: Session):
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=settings.event_retention_minutes)
+        db.execute(delete(OutboxEvent).where(OutboxEvent.created_at < cutoff))
+        db.commit()
+
+    # Current state of a topic, sent once before the deltas
+    @staticmethod
+    def get_snapshot(db: Session, topic: str):
+        if topic.startswith("products:"):
+            product = db.execute(
+                select(Product.id, Product.stock, Product.is_available).where(Product.id == int(topic.split(":")[1]))
+            ).first()
+            return dict(product._mapping) if product else None
+
+        query = select(Order.id, Order.user_id, Order.created_at, Order.status, Order.total_amount)
+        if topic != ADMIN_ORDERS_TOPIC:
+            query = query.where(Order.user_id == int(topic.rsplit(":", 1)[1]))
+        orders = db.execute(
+            query.order_by(Order.created_at.desc(), Order.id.desc()).limit(settings.event_snapshot_limit)
+        ).all()
+        return [
+            order_payload(order.id, order.user_id, order.created_at, order.status, total_amount=order.total_amount)
+            for order in orders
+        ]
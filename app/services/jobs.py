@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import case, cast, func, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Job
+from app.utils.responses import ResponseHandler
+
+
+class JobService:
+    # Add a job to the queue, committed together with the caller's transaction
+    @staticmethod
+    def enqueue(db: Session, kind: str, payload: dict, delay_seconds: float = 0, max_attempts: int = 5):
+        job = Job(kind=kind, payload=payload, max_attempts=max_attempts)
+        if delay_seconds:
+            job.run_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        db.add(job)
+        return job
+
+    # Claim a batch of due jobs, SKIP LOCKED lets many workers poll the same table without blocking
+    @staticmethod
+    def claim(db: Session, limit: int) -> list[Job]:
+        now = datetime.now(timezone.utc)
+        JobService.requeue_stale(db, now)
+
+        due = (
+            select(Job.id)
+            .where(Job.status == "queued", Job.run_at <= now)
+            .order_by(Job.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        jobs = db.scalars(
+            update(Job)
+            .where(Job.id.in_(due))
+            .values(status="running", attempts=Job.attempts + 1, locked_at=now)
+            .returning(Job)
+            .execution_options(synchronize_session=False)
+        ).all()
+        # Detach the claimed rows so the commit doesn't expire them and force a reload per job
+        for job in jobs:
+            db.expunge(job)
+        db.commit()
+        return jobs
+
+    # Jobs left running by a crashed worker go back to the queue after the visibility timeout.
+    # claim() already counted the attempt, so a job that keeps killing its worker is dead-lettered
+    # once its attempts are exhausted instead of being requeued forever.
+    @staticmethod
+    def requeue_stale(db: Session, now: datetime):
+        stale_before = now - timedelta(seconds=settings.job_visibility_timeout_seconds)
+        exhausted = Job.attempts >= Job.max_attempts
+        db.execute(
+            update(Job)
+            .where(Job.status == "running", Job.locked_at < stale_before)
+            .values(
+                status=cast(case((exhausted, "dead"), else_="queued"), Job.status.type),
+                finished_at=case((exhausted, now), else_=None),
+                last_error="Worker did not finish the job within the visibility timeout",
+                locked_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def complete(db: Session, job: Job):
+        db.add(job)
+        job.status = "done"
+        job.locked_at = None
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+
+    # Retry with exponential backoff, dead-letter once attempts are exhausted
+    @staticmethod
+    def fail(db: Session, job: Job, error: str):
+        db.add(job)
+        job.last_error = error[:1000]
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = "dead"
+            job.finished_at = datetime.now(timezone.utc)
+        else:
+            job.status = "queued"
+            job.run_at = datetime.now(timezone.utc) + timedelta(seconds=2 ** job.attempts)
+        db.commit()
+
+    @staticmethod
+    def get_stats(db: Session):
+        rows = db.execute(
+            select(Job.kind, Job.status, func.count(Job.id)).group_by(Job.kind, Job.status)
+        ).all()
+        stats = {}
+        for kind, status, count in rows:
+            stats.setdefault(kind, {"queued": 0, "running": 0, "done": 0, "dead": 0})[status] = count
+        return ResponseHandler.success("Job queue stats", stats)
+
+    @staticmethod
+    def get_dead_jobs(db: Session, limit: int):
+        jobs = db.query(Job).filter(Job.status == "dead").order_by(Job.id.desc()).limit(limit).all()
+        return ResponseHandler.success(f"{len(jobs)} dead jobs", jobs)
+
+    # Requeue a dead-lettered job with a fresh set of attempts
+    @staticmethod
+    def retry_job(db: Session, job_id: int):
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            ResponseHandler.not_found_error("Job", job_id)
+        if job.status != "dead":
+            ResponseHandler.bad_request_error("Only dead jobs can be retried")
+        job.status = "queued"
+        job.attempts = 0
+        job.run_at = datetime.now(timezone.utc)
+        job.finished_at = None
+        db.commit()
+        db.refresh(job)
+        return ResponseHandler.update_success("Job", job.id, job)
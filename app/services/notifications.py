@@ -0,0 +1,187 @@
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from threading import Lock
+import json
+import logging
+import smtplib
+import time
+from sqlalchemy import JSON, delete, insert, literal, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Job, Product, User, Wishlist, WishlistNotification, wishlist_items
+from app.services.jobs import JobService
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationSink(ABC):
+    """Where wishlist digests are delivered. A digest is a dict with user_id, email, full_name
+    and items, one item per product with the changes since the previous digest."""
+
+    @abstractmethod
+    def send_batch(self, digests: list[dict]):
+        ...
+
+
+class FileSink(NotificationSink):
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+
+    def send_batch(self, digests):
+        lines = "".join(json.dumps(digest, default=str) + "\n" for digest in digests)
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+class SmtpSink(NotificationSink):
+    def __init__(self, host: str, port: int, sender: str):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send_batch(self, digests):
+        # One connection per batch instead of per message
+        with smtplib.SMTP(self.host, self.port) as smtp:
+            for digest in digests:
+                smtp.send_message(self.build_message(digest))
+
+    def build_message(self, digest: dict) -> EmailMessage:
+        lines = [f"Hi {digest['full_name']},", "", "Some products on your wishlist changed:", ""]
+        for item in digest["items"]:
+            changes = []
+            if "back_in_stock" in item:
+                changes.append("back in stock")
+            if "price_drop" in item:
+                changes.append(f"now {item['price_drop']['new_price']:.2f} (was {item['price_drop']['old_price']:.2f})")
+            lines.append(f"- {item['title']}: {', '.join(changes)}")
+
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = digest["email"]
+        message["Subject"] = "Updates on your wishlist"
+        message.set_content("\n".join(lines))
+        return message
+
+
+def get_notification_sink() -> NotificationSink:
+    if settings.notification_sink == "smtp":
+        return SmtpSink(settings.smtp_host, settings.smtp_port, settings.smtp_sender)
+    return FileSink(settings.notification_file_path)
+
+
+class NotificationService:
+    sink: NotificationSink | None = None
+
+    # Queue the fan-out of a product change, inside the caller's transaction
+    @staticmethod
+    def product_changed(db: Session, product_id: int, kind: str, payload: dict):
+        JobService.enqueue(db, "wishlist.fanout", {"product_id": product_id, "kind": kind, "payload": payload})
+
+    # Job: record the change for every wishlister of the product, one INSERT ... SELECT per chunk of users
+    @staticmethod
+    def fan_out(db: Session, payload: dict):
+        started = time.monotonic()
+        product_id, kind = payload["product_id"], payload["kind"]
+        chunk_size = settings.notification_chunk_size
+        last_user_id = 0
+        total = 0
+        while True:
+            wishlisters = (
+                select(
+                    Wishlist.user_id, literal(product_id),
+                    literal(kind, WishlistNotification.kind.type), literal(payload["payload"], JSON))
+                .join(wishlist_items, wishlist_items.c.wishlist_id == Wishlist.id)
+                .where(wishlist_items.c.product_id == product_id, Wishlist.user_id > last_user_id)
+                .order_by(Wishlist.user_id)
+                .limit(chunk_size)
+            )
+            user_ids = db.scalars(
+                insert(WishlistNotification)
+                .from_select(["user_id", "product_id", "kind", "payload"], wishlisters)
+                .returning(WishlistNotification.user_id)
+            ).all()
+            db.commit()
+            if not user_ids:
+                break
+            total += len(user_ids)
+            last_user_id = max(user_ids)
+            if len(user_ids) < chunk_size:
+                break
+
+        if total:
+            NotificationService.schedule_digest(db)
+        elapsed = time.monotonic() - started
+        logger.info("Fanned out %s of product %s to %d wishlists in %.2fs (%.0f/s)",
+                    kind, product_id, total, elapsed, total / elapsed if elapsed else 0)
+
+    # Changes are collected for a short window so users get one digest for several of them
+    @staticmethod
+    def schedule_digest(db: Session):
+        pending = db.scalar(select(Job.id).where(Job.kind == "wishlist.digest", Job.status == "queued").limit(1))
+        if pending is None:
+            JobService.enqueue(db, "wishlist.digest", {}, delay_seconds=settings.notification_digest_delay_seconds)
+            db.commit()
+
+    # Job: send one digest per user with pending changes, walking users in keyset chunks
+    @staticmethod
+    def send_digests(db: Session, payload: dict):
+        sink = NotificationService.sink or get_notification_sink()
+        started = time.monotonic()
+        chunk_size = settings.notification_chunk_size
+        last_user_id = 0
+        users = notifications = 0
+        while True:
+            user_ids = db.scalars(
+                select(WishlistNotification.user_id)
+                .where(WishlistNotification.user_id > last_user_id)
+                .group_by(WishlistNotification.user_id)
+                .order_by(WishlistNotification.user_id)
+                .limit(chunk_size)
+            ).all()
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+
+            rows = db.execute(
+                select(
+                    WishlistNotification.id, WishlistNotification.user_id, WishlistNotification.product_id,
+                    WishlistNotification.kind, WishlistNotification.payload,
+                    User.email, User.full_name, Product.title,
+                )
+                .join(User, User.id == WishlistNotification.user_id)
+                .join(Product, Product.id == WishlistNotification.product_id)
+                .where(WishlistNotification.user_id.in_(user_ids))
+                .order_by(WishlistNotification.user_id, WishlistNotification.id)
+            ).all()
+            digests = NotificationService.build_digests(rows)
+            sink.send_batch(digests)
+
+            # Only the rows that went out, changes recorded meanwhile wait for the next digest
+            db.execute(delete(WishlistNotification).where(WishlistNotification.id.in_([row.id for row in rows])))
+            db.commit()
+            users += len(digests)
+            notifications += len(rows)
+
+        elapsed = time.monotonic() - started
+        logger.info("Sent %d wishlist digests covering %d changes in %.2fs (%.0f digests/s)",
+                    users, notifications, elapsed, users / elapsed if elapsed else 0)
+
+    # Coalesce the pending changes of each user into one digest, the latest change per product and kind wins
+    @staticmethod
+    def build_digests(rows) -> list[dict]:
+        digests = {}
+        for row in rows:
+            digest = digests.get(row.user_id)
+            if digest is None:
+                digest = digests[row.user_id] = {
+                    "user_id": row.user_id, "email": row.email, "full_name": row.full_name, "items": {}}
+            item = digest["items"].setdefault(row.product_id, {"product_id": row.product_id, "title": row.title})
+            if row.kind == "price_drop" and "price_drop" in item:
+                # Keep the original price of the first drop so the digest shows the full change
+                item["price_drop"] = {**row.payload, "old_price": item["price_drop"]["old_price"]}
+            else:
+                item[row.kind] = row.payload
+        for digest in digests.values():
+            digest["items"] = list(digest["items"].values())
+        return list(digests.values())
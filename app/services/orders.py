@@ -1,8 +1,32 @@
+from sqlalchemy import Integer, case, column, func, select, tuple_, update, values
 from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
+from datetime import datetime
 from app.models.models import Order, OrderItem, CartItem, Product
-from app.schemas.orders import OrderCreate
+from app.schemas.orders import BulkOrderStatusResult, OrderBase, OrderCreate
 from app.services.carts import CartService
+from app.services.pricing import PricingService
+from app.services.catalog import CatalogService
+from app.services.jobs import JobService
+from app.services.analytics import AnalyticsService, EXCLUDED_STATUSES, sales_day
+from app.services.events import EventService
+from app.utils.pagination import decode_cursor, next_cursor
+from app.utils.serialization import load_options
 from fastapi import HTTPException, status
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Allowed order status transitions, enforced by bulk updates
+ORDER_STATUS_TRANSITIONS = {
+    "pending": {"processing", "cancelled"},
+    "processing": {"shipped", "cancelled"},
+    "shipped": {"delivered"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+
 
 class OrderService:
     @staticmethod
@@ -12,88 +36,333 @@ class OrderService:
         if not cart or not cart.cart_items:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found or is empty")
 
-        subtotal = sum(item.subtotal for item in cart.cart_items)
-        tax = subtotal * 0.10
-        total_amount = subtotal + tax
+        products = CartService.get_products_for_items(db, cart.cart_items)
+        engine = PricingService.get_engine(db)
+        if order_details.coupon_code and not engine.has_coupon(order_details.coupon_code):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Coupon {order_details.coupon_code} is not valid")
+
+        priced = engine.price_cart(
+            [(item.product_id, item.quantity) for item in cart.cart_items],
+            products,
+            coupon_code=order_details.coupon_code,
+            region=order_details.region,
+        )
+        total_amount = priced.total
+
+        reserved = OrderService.reserve_stock(db, cart.cart_items, products)
 
         new_order = Order(
             user_id=user_id,
             total_amount=total_amount,
+            status="pending",
             address=order_details.address,
             payment_method=order_details.payment_method,
+            order_items=[
+                OrderItem(product_id=line.product_id, quantity=line.quantity, subtotal=line.subtotal)
+                for line in priced.lines
+            ],
         )
-
         db.add(new_order)
-        db.flush() # Use flush to get new_order.id without committing the transaction yet
+        db.flush()
+
+        # The rollup upserts hit the same sales_daily row for every order of the day, so they run in the
+        # worker rather than holding that row lock in every checkout transaction
+        JobService.enqueue(db, "analytics.order", {
+            "day": sales_day(new_order.created_at).isoformat(),
+            "total_amount": total_amount,
+            "lines": [
+                [line.product_id, products[line.product_id].category_id, line.quantity, line.subtotal]
+                for line in priced.lines
+            ],
+        })
+
+        # Payment and notification run in the background worker, the request only accepts the order
+        EventService.order_changed(db, "order.created", new_order)
+
+        # created_at lets the handlers look the order up in its own partition
+        JobService.enqueue(db, "order.payment", {"order_id": new_order.id, "created_at": new_order.created_at.isoformat()})
+
+        # Clear the cart
+        db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+
+        db.commit()
         db.refresh(new_order)
 
-        out_of_stock_items = []
-        for item in cart.cart_items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
-            if not product:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product with id {item.product_id} not found")
+        # After the commit, so a concurrent reader can't refill the cache with the stock from before this order
+        for row in reserved:
+            if row.stock <= 0:
+                CatalogService.invalidate_product(row.id)
+
+        return {"message": "Order created successfully", "data": new_order}
 
-            if product.stock < item.quantity:
-                out_of_stock_items.append(product.title)
+    # Reserve stock for every cart line with one conditional UPDATE, rolling back on any shortfall.
+    # Returns the (id, stock, is_available) rows of the reserved products.
+    @staticmethod
+    def reserve_stock(db: Session, cart_items, products):
+        quantities = {}
+        for item in cart_items:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
 
+        # Lock the rows in id order first so concurrent multi-product checkouts can't deadlock
+        product_ids = sorted(quantities)
+        db.execute(select(Product.id).where(Product.id.in_(product_ids)).order_by(Product.id).with_for_update())
+
+        reserved = values(
+            column("product_id", Integer), column("quantity", Integer), name="reserved"
+        ).data(list(quantities.items()))
+        result = db.execute(
+            update(Product)
+            .where(Product.id == reserved.c.product_id, Product.stock >= reserved.c.quantity)
+            # Only clear the flag on a sell-out, a product an admin switched off stays off
+            .values(stock=Product.stock - reserved.c.quantity,
+                    is_available=case((Product.stock - reserved.c.quantity <= 0, False), else_=Product.is_available))
+            .returning(Product.id, Product.stock, Product.is_available)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        reserved_ids = {row.id for row in result}
+        out_of_stock_items = [products[product_id].title for product_id in product_ids if product_id not in reserved_ids]
         if out_of_stock_items:
-            print(f"Raising HTTPException: The following products are out of stock or have insufficient stock: {', '.join(out_of_stock_items)}.")
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"The following products are out of stock or have insufficient stock: {', '.join(out_of_stock_items)}."
             )
 
-        for item in cart.cart_items:
-            product = db.query(Product).filter(Product.id == item.product_id).first() # Re-fetch to ensure latest state after potential concurrent updates
-            order_item = OrderItem(
-                order_id=new_order.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                subtotal=item.subtotal,
+        EventService.stock_changed(db, result)
+        return result
+
+    # Pipeline step: confirm payment of an accepted order and move it to processing
+    @staticmethod
+    def process_payment(db: Session, payload: dict):
+        order = OrderService.find_job_order(db, payload).with_for_update().first()
+        if not order or order.status != "pending":
+            # Cancelled or already advanced by an earlier attempt
+            db.rollback()
+            return
+
+        # No payment provider is wired in yet, every payment method is accepted as is
+        order.status = "processing"
+        EventService.order_changed(db, "order.status", order, previous_status="pending")
+        JobService.enqueue(db, "order.notification", {
+            "order_id": order.id, "created_at": order.created_at.isoformat(), "event": "confirmed"})
+        db.commit()
+
+    # Pipeline step: tell the customer about their order
+    @staticmethod
+    def send_notification(db: Session, payload: dict):
+        order = OrderService.find_job_order(db, payload).first()
+        if not order:
+            return
+        logger.info("Order %s %s for user %s, total %.2f", order.id, payload["event"], order.user_id, order.total_amount)
+
+    # Jobs enqueued before orders were partitioned only carry the order id
+    @staticmethod
+    def find_job_order(db: Session, payload: dict):
+        query = db.query(Order).filter(Order.id == payload["order_id"])
+        if "created_at" in payload:
+            query = query.filter(Order.created_at == datetime.fromisoformat(payload["created_at"]))
+        return query
+
+    # Keyset-paginated listing shared by the user and admin order history
+    @staticmethod
+    def list_orders(db: Session, user_id: int | None, limit: int, cursor: str | None = None, page: int = 1, order_status: str | None = None,
+                    created_from: datetime | None = None, created_to: datetime | None = None, view: str = "full",
+                    fields: frozenset[str] | None = None):
+        # The keyset cursor needs created_at and id whatever the fieldset
+        if fields is not None:
+            fields = fields | {"id", "created_at"}
+        if view == "summary":
+            item_count = (
+                select(func.count(OrderItem.id))
+                .where(OrderItem.order_id == Order.id, OrderItem.order_created_at == Order.created_at)
+                .correlate(Order)
+                .scalar_subquery()
             )
-            db.add(order_item)
+            columns = {
+                "id": Order.id, "user_id": Order.user_id, "total_amount": Order.total_amount, "status": Order.status,
+                "created_at": Order.created_at, "payment_method": Order.payment_method, "item_count": item_count,
+            }
+            query = db.query(*(
+                expression.label(name) for name, expression in columns.items() if fields is None or name in fields))
+        else:
+            query = db.query(Order).options(*load_options(Order, OrderBase, fields))
 
-            # Decrease the stock of the product
-            product.stock -= item.quantity
-            if product.stock <= 0:
-                product.is_available = False
-            db.add(product)
+        if user_id is not None:
+            query = query.filter(Order.user_id == user_id)
+        if order_status:
+            query = query.filter(Order.status == order_status)
+        if created_from:
+            query = query.filter(Order.created_at >= created_from)
+        if created_to:
+            query = query.filter(Order.created_at < created_to)
 
-        # Clear the cart
-        db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+        query = query.order_by(Order.created_at.desc(), Order.id.desc())
+        if cursor:
+            created_at, order_id = decode_cursor(cursor)
+            # The plain created_at bound is redundant but, unlike the row comparison, prunes newer partitions
+            query = query.filter(tuple_(Order.created_at, Order.id) < (created_at, order_id), Order.created_at <= created_at)
+        elif page > 1:
+            # Offset paging is kept for existing clients that still send page
+            query = query.offset((page - 1) * limit)
 
-        db.commit()
+        orders, cursor = next_cursor(query.limit(limit + 1).all(), limit, lambda order: (order.created_at, order.id))
+        if view == "summary":
+            orders = [dict(order._mapping) for order in orders]
+        return {"message": f"{len(orders)} orders", "data": orders, "next_cursor": cursor}
 
-        return {"message": "Order created successfully", "data": new_order}
+    @staticmethod
+    def get_user_orders(db: Session, user_id: int, limit: int, cursor: str | None = None, page: int = 1, **filters):
+        return OrderService.list_orders(db, user_id, limit, cursor, page, **filters)
 
     @staticmethod
-    def get_user_orders(db: Session, user_id: int, page: int, limit: int):
-        orders = db.query(Order).filter(Order.user_id == user_id).offset((page - 1) * limit).limit(limit).all()
-        return {"message": f"Page {page} with {limit} orders", "data": orders}
+    def get_all_orders(db: Session, limit: int, cursor: str | None = None, page: int = 1, **filters):
+        return OrderService.list_orders(db, None, limit, cursor, page, **filters)
 
+    # Orders are partitioned by created_at, filtering on it lets Postgres read only the order's partition
+    # instead of probing the id index of every month
     @staticmethod
-    def get_all_orders(db: Session, page: int, limit: int):
-        orders = db.query(Order).offset((page - 1) * limit).limit(limit).all()
-        return {"message": f"Page {page} with {limit} orders", "data": orders}
+    def find_order(db: Session, order_id: int, created_at: datetime | None = None):
+        query = db.query(Order).filter(Order.id == order_id)
+        if created_at is not None:
+            query = query.filter(Order.created_at == created_at)
+        return query
 
     @staticmethod
-    def update_order_status(db: Session, order_id: int, new_status: str):
-        order = db.query(Order).filter(Order.id == order_id).first()
+    def update_order_status(db: Session, order_id: int, new_status: str, created_at: datetime | None = None):
+        order = OrderService.find_order(db, order_id, created_at).first()
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Order with id {order_id} not found")
 
+        # Cancelling an order takes it out of the sales rollups, reinstating it puts it back
+        was_counted = order.status not in EXCLUDED_STATUSES
+        is_counted = new_status not in EXCLUDED_STATUSES
+        if was_counted != is_counted:
+            AnalyticsService.record_existing_order(db, order, 1 if is_counted else -1)
+
+        previous_status = order.status
         order.status = new_status
+        EventService.order_changed(db, "order.status", order, previous_status=previous_status)
         db.commit()
         db.refresh(order)
         return {"message": f"Order with id {order_id} status updated to {new_status}", "data": order}
 
     @staticmethod
-    def delete_order(db: Session, order_id: int, user_id: int):
-        order = db.query(Order).filter(Order.id == order_id, Order.user_id == user_id).first()
+    def delete_order(db: Session, order_id: int, user_id: int, created_at: datetime | None = None):
+        order = OrderService.find_order(db, order_id, created_at).filter(Order.user_id == user_id).first()
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Order with id {order_id} not found")
 
+        if order.status not in EXCLUDED_STATUSES:
+            AnalyticsService.record_existing_order(db, order, -1)
+        EventService.order_changed(db, "order.deleted", order)
         db.delete(order)
         db.commit()
 
         return {"message": f"Order with id {order_id} has been successfully deleted."}
+
+    # Apply one set-based status update to the candidate orders, returning (id, previous status, user_id, created_at) rows
+    @staticmethod
+    def apply_status(db: Session, candidates, target_status: str):
+        sources = [source for source, targets in ORDER_STATUS_TRANSITIONS.items() if target_status in targets]
+        previous = candidates.with_for_update().cte("previous")
+        updated = db.execute(
+            update(Order)
+            .where(Order.id == previous.c.id, previous.c.status.in_(sources))
+            .values(status=target_status)
+            .returning(Order.id, previous.c.status, Order.user_id, Order.created_at)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        if target_status in EXCLUDED_STATUSES:
+            AnalyticsService.record_existing_orders(
+                db, [row.id for row in updated if row.status not in EXCLUDED_STATUSES], -1)
+        EventService.orders_status_changed(db, updated, target_status)
+        return updated
+
+    @staticmethod
+    def filter_candidates(filters: dict, target_status: str):
+        sources = [source for source, targets in ORDER_STATUS_TRANSITIONS.items() if target_status in targets]
+        candidates = select(Order.id, Order.status).where(Order.status.in_(sources))
+        if filters.get("status"):
+            candidates = candidates.where(Order.status == filters["status"])
+        if filters.get("created_from"):
+            candidates = candidates.where(Order.created_at >= filters["created_from"])
+        if filters.get("created_to"):
+            candidates = candidates.where(Order.created_at < filters["created_to"])
+        return candidates
+
+    # Move many orders to a new status with a single UPDATE ... RETURNING
+    @staticmethod
+    def bulk_update_status(db: Session, target_status: str, order_ids: list[int] | None = None, filters: dict | None = None):
+        if order_ids is not None:
+            candidates = select(Order.id, Order.status).where(Order.id.in_(order_ids))
+            current = dict(db.execute(candidates).all())
+        else:
+            candidates = OrderService.filter_candidates(filters or {}, target_status)
+            current = {}
+
+        updated = OrderService.apply_status(db, candidates, target_status)
+        db.commit()
+
+        results = OrderService.status_results(updated, target_status, order_ids, current)
+        data = {"updated": len(updated), "skipped": len(results) - len(updated), "results": results}
+        return {"message": f"{len(updated)} orders moved to {target_status}", "data": data}
+
+    # One result per requested order: updated ones with their previous status, the rest with the reason they were skipped
+    @staticmethod
+    def status_results(updated, target_status: str, order_ids: list[int] | None, current: dict):
+        results = [
+            {"order_id": row.id, "previous_status": row.status, "updated": True, "reason": None}
+            for row in updated
+        ]
+        if order_ids is not None:
+            updated_ids = {row.id for row in updated}
+            for order_id in dict.fromkeys(order_ids):
+                if order_id in updated_ids:
+                    continue
+                previous_status = current.get(order_id)
+                reason = "not found" if previous_status is None else f"cannot move from {previous_status} to {target_status}"
+                results.append({"order_id": order_id, "previous_status": previous_status, "updated": False, "reason": reason})
+        return results
+
+    # Same as bulk_update_status but committed in chunks, yielding one NDJSON line of per-order results per chunk
+    @staticmethod
+    def stream_bulk_update_status(target_status: str, order_ids: list[int] | None = None, filters: dict | None = None, chunk_size: int = 500):
+        updated_total = processed = 0
+        last_id = 0
+        with SessionLocal() as db:
+            while True:
+                if order_ids is not None:
+                    chunk = order_ids[processed:processed + chunk_size]
+                    if not chunk:
+                        break
+                    size = len(chunk)
+                    current = dict(db.execute(select(Order.id, Order.status).where(Order.id.in_(chunk))).all())
+                else:
+                    current = dict(db.execute(
+                        OrderService.filter_candidates(filters or {}, target_status)
+                        .where(Order.id > last_id)
+                        .order_by(Order.id)
+                        .limit(chunk_size)
+                    ).all())
+                    if not current:
+                        break
+                    # Matched by the filter, so a row that changed status in the meantime is reported as skipped
+                    chunk = list(current)
+                    size = len(chunk)
+                    last_id = chunk[-1]
+                candidates = select(Order.id, Order.status).where(Order.id.in_(chunk))
+
+                updated = OrderService.apply_status(db, candidates, target_status)
+                db.commit()
+                processed += size
+                updated_total += len(updated)
+                results = OrderService.status_results(updated, target_status, chunk, current)
+                yield json.dumps({
+                    "processed": processed,
+                    "updated": updated_total,
+                    "results": [BulkOrderStatusResult(**result).model_dump() for result in results],
+                }) + "\n"
+
+        yield json.dumps({"done": True, "processed": processed, "updated": updated_total, "skipped": processed - updated_total}) + "\n"
@@ -0,0 +1,88 @@
+from datetime import date, datetime, timezone
+import logging
+import re
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Monthly partitions of orders/order_items are named <table>_pYYYY_MM
+PARTITION_NAME = re.compile(r"^orders_p(\d{4})_(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# Bounds as explicit UTC timestamps, a bare date would be read in the session's TimeZone
+def month_bounds(month: date) -> str:
+    return f"FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+
+
+class PartitionService:
+    # Create the monthly partitions for the current month and the next few, skipping existing ones
+    @staticmethod
+    def ensure_partitions(db: Session, months_ahead: int) -> list[str]:
+        # Serialize concurrent workers, CREATE TABLE IF NOT EXISTS alone still races on the catalog
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext('orders_partitions'))"))
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        existing = {name for name, _ in PartitionService.get_partitions(db)}
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(this_month, offset)
+            suffix = month.strftime("%Y_%m")
+            if f"orders_p{suffix}" in existing:
+                continue
+            db.execute(text(f"CREATE TABLE IF NOT EXISTS orders_p{suffix} PARTITION OF orders FOR VALUES {month_bounds(month)}"))
+            db.execute(text(f"CREATE TABLE IF NOT EXISTS order_items_p{suffix} PARTITION OF order_items FOR VALUES {month_bounds(month)}"))
+            created.append(f"orders_p{suffix}")
+        db.commit()
+        if created:
+            logger.info("Created order partitions %s", ", ".join(created))
+        return created
+
+    # Monthly order partitions as (name, first day of the month), oldest first
+    @staticmethod
+    def get_partitions(db: Session) -> list[tuple[str, date]]:
+        names = db.scalars(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'orders'::regclass"
+        )).all()
+        partitions = []
+        for name in names:
+            match = PARTITION_NAME.match(name)
+            if match:
+                partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    # Copy every month before `before` into orders_archive, then detach and drop its partitions.
+    # Each month is archived in its own transaction so a failure leaves earlier months done.
+    @staticmethod
+    def archive_before(db: Session, before: date) -> list[tuple[str, int]]:
+        archived = []
+        for name, month in PartitionService.get_partitions(db):
+            if add_months(month, 1) > before:
+                break
+            suffix = month.strftime("%Y_%m")
+            count = db.execute(text(f"""
+                INSERT INTO orders_archive (id, user_id, created_at, total_amount, status, address, payment_method, order_items)
+                SELECT o.id, o.user_id, o.created_at, o.total_amount, o.status, o.address, o.payment_method,
+                       COALESCE(jsonb_agg(jsonb_build_object(
+                           'id', i.id, 'product_id', i.product_id, 'quantity', i.quantity, 'subtotal', i.subtotal
+                       ) ORDER BY i.id) FILTER (WHERE i.id IS NOT NULL), '[]'::jsonb)
+                FROM orders_p{suffix} o
+                LEFT JOIN order_items_p{suffix} i ON i.order_id = o.id AND i.order_created_at = o.created_at
+                GROUP BY o.id, o.user_id, o.created_at, o.total_amount, o.status, o.address, o.payment_method
+                ON CONFLICT (id) DO NOTHING
+            """)).rowcount
+            # Items go first, the orders partition is still referenced by their foreign key
+            db.execute(text(f"ALTER TABLE order_items DETACH PARTITION order_items_p{suffix}"))
+            db.execute(text(f"DROP TABLE order_items_p{suffix}"))
+            db.execute(text(f"ALTER TABLE orders DETACH PARTITION orders_p{suffix}"))
+            db.execute(text(f"DROP TABLE orders_p{suffix}"))
+            db.commit()
+            logger.info("Archived %d orders from %s", count, name)
+            archived.append((name, count))
+        return archived
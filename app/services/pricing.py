@@ -0,0 +1,241 @@
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Iterable, Mapping
+import time
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Promotion, TaxRate
+from app.schemas.promotions import PromotionCreate, TaxRateUpsert
+from app.utils.responses import ResponseHandler
+
+
+@dataclass(slots=True)
+class PricedLine:
+    product_id: int
+    quantity: int
+    unit_price: float
+    subtotal: float
+
+
+@dataclass(slots=True)
+class PricedCart:
+    lines: list[PricedLine] = field(default_factory=list)
+    subtotal: float = 0.0
+    discount: float = 0.0
+    tax: float = 0.0
+    total: float = 0.0
+
+
+class PricingEngine:
+    """Promotion rules compiled into lookup tables, so pricing a cart never scans the rule list."""
+
+    def __init__(self, promotions: Iterable[Promotion], tax_rates: Mapping[str, float], default_tax_rate: float):
+        self.tiers_by_product: dict[int, list[tuple[int, float]]] = {}
+        self.tiers_by_category: dict[int, list[tuple[int, float]]] = {}
+        self.global_tiers: list[tuple[int, float]] = []
+        self.bundles_by_product: dict[int, list[tuple[tuple[int, ...], float]]] = {}
+        self.coupons: dict[str, tuple[int | None, int | None, float, float]] = {}
+        self.tax_rates = {region.lower(): rate for region, rate in tax_rates.items()}
+        self.default_tax_rate = default_tax_rate
+
+        for promotion in promotions:
+            if not promotion.is_active:
+                continue
+            if promotion.kind == "tiered":
+                tier = (promotion.min_quantity or 1, promotion.discount_percentage)
+                if promotion.product_id is not None:
+                    self.tiers_by_product.setdefault(promotion.product_id, []).append(tier)
+                elif promotion.category_id is not None:
+                    self.tiers_by_category.setdefault(promotion.category_id, []).append(tier)
+                else:
+                    self.global_tiers.append(tier)
+            elif promotion.kind == "bundle" and promotion.bundle_product_ids:
+                bundle = (tuple(sorted(set(promotion.bundle_product_ids))), promotion.discount_percentage)
+                # Index the bundle under its first product only, it can't apply without it
+                self.bundles_by_product.setdefault(bundle[0][0], []).append(bundle)
+            elif promotion.kind == "coupon" and promotion.coupon_code:
+                self.coupons[promotion.coupon_code.upper()] = (
+                    promotion.product_id,
+                    promotion.category_id,
+                    promotion.min_subtotal or 0.0,
+                    promotion.discount_percentage,
+                )
+
+        # Highest discount first so the first reachable tier is the best one
+        for tiers in (*self.tiers_by_product.values(), *self.tiers_by_category.values(), self.global_tiers):
+            tiers.sort(key=lambda tier: tier[1], reverse=True)
+
+    def tax_rate(self, region: str | None) -> float:
+        if not region:
+            return self.default_tax_rate
+        return self.tax_rates.get(region.lower(), self.default_tax_rate)
+
+    def has_coupon(self, code: str) -> bool:
+        return code.upper() in self.coupons
+
+    def price_carts(self, carts: Iterable[Iterable[tuple[int, int]]], products: Mapping[int, object], coupon_code: str | None = None, region: str | None = None) -> list[PricedCart]:
+        """Price many carts in one call. Each cart is a list of (product_id, quantity) pairs and
+        `products` maps every referenced product id to an object with price, discount_percentage
+        and category_id (ORM rows or cached snapshots)."""
+        coupon = self.coupons.get(coupon_code.upper()) if coupon_code else None
+        tax_rate = self.tax_rate(region)
+        tiers_by_product = self.tiers_by_product
+        tiers_by_category = self.tiers_by_category
+        global_tiers = self.global_tiers
+        bundles_by_product = self.bundles_by_product
+
+        priced = []
+        for items in carts:
+            lines = []
+            quantities = {}
+            for product_id, quantity in items:
+                product = products[product_id]
+                unit_price = product.price * (1 - product.discount_percentage / 100)
+
+                tier_pct = 0.0
+                for tiers in (tiers_by_product.get(product_id), tiers_by_category.get(product.category_id), global_tiers):
+                    if tiers:
+                        for min_quantity, pct in tiers:
+                            if quantity >= min_quantity:
+                                if pct > tier_pct:
+                                    tier_pct = pct
+                                break
+                if tier_pct:
+                    unit_price *= 1 - tier_pct / 100
+
+                lines.append(PricedLine(product_id, quantity, unit_price, unit_price * quantity))
+                quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+            if bundles_by_product:
+                self._apply_bundles(lines, quantities)
+
+            subtotal = 0.0
+            eligible = 0.0
+            for line in lines:
+                line.unit_price = round(line.unit_price, 2)
+                line.subtotal = round(line.subtotal, 2)
+                subtotal += line.subtotal
+                if coupon is not None and self._in_scope(coupon, line.product_id, products[line.product_id].category_id):
+                    eligible += line.subtotal
+
+            discount = 0.0
+            if coupon is not None and subtotal >= coupon[2]:
+                discount = round(eligible * coupon[3] / 100, 2)
+
+            subtotal = round(subtotal, 2)
+            tax = round((subtotal - discount) * tax_rate, 2)
+            priced.append(PricedCart(lines, subtotal, discount, tax, round(subtotal - discount + tax, 2)))
+        return priced
+
+    def price_cart(self, items: Iterable[tuple[int, int]], products: Mapping[int, object], coupon_code: str | None = None, region: str | None = None) -> PricedCart:
+        return self.price_carts([items], products, coupon_code, region)[0]
+
+    def _apply_bundles(self, lines: list[PricedLine], quantities: dict[int, int]):
+        remaining = dict(quantities)
+        # Units of each line already discounted by a bundle, so a line never gets more than its quantity
+        bundled = [0] * len(lines)
+        for product_id in quantities:
+            for bundle_ids, pct in self.bundles_by_product.get(product_id, ()):
+                count = min(remaining.get(bundle_id, 0) for bundle_id in bundle_ids)
+                if count <= 0:
+                    continue
+                for bundle_id in bundle_ids:
+                    remaining[bundle_id] -= count
+                    # Spread the bundled units over the lines of the product, as many as each line holds
+                    left = count
+                    for index, line in enumerate(lines):
+                        if left == 0:
+                            break
+                        if line.product_id == bundle_id:
+                            units = min(left, line.quantity - bundled[index])
+                            if units > 0:
+                                line.subtotal -= line.unit_price * units * pct / 100
+                                bundled[index] += units
+                                left -= units
+
+    @staticmethod
+    def _in_scope(coupon, product_id: int, category_id: int) -> bool:
+        scope_product_id, scope_category_id = coupon[0], coupon[1]
+        if scope_product_id is not None:
+            return scope_product_id == product_id
+        if scope_category_id is not None:
+            return scope_category_id == category_id
+        return True
+
+
+class PricingService:
+    _engine: PricingEngine | None = None
+    _compiled_at: float = 0.0
+    _lock = Lock()
+
+    @staticmethod
+    def get_engine(db: Session) -> PricingEngine:
+        # Compiled plans are cached per process and recompiled after a TTL so edits made through
+        # other workers are picked up without a shared cache
+        engine = PricingService._engine
+        if engine is not None and time.monotonic() - PricingService._compiled_at < settings.pricing_cache_ttl_seconds:
+            return engine
+
+        with PricingService._lock:
+            current = PricingService._engine
+            # Rebuild unless another thread already did, an invalidate() in between leaves None behind
+            if current is None or current is engine:
+                promotions = db.query(Promotion).filter(Promotion.is_active == True).all()
+                tax_rates = {tax_rate.region: tax_rate.rate for tax_rate in db.query(TaxRate).all()}
+                current = PricingEngine(promotions, tax_rates, settings.default_tax_rate)
+                PricingService._engine = current
+                PricingService._compiled_at = time.monotonic()
+            return current
+
+    @staticmethod
+    def invalidate():
+        PricingService._engine = None
+
+    @staticmethod
+    def get_all_promotions(db: Session):
+        promotions = db.query(Promotion).order_by(Promotion.id.asc()).all()
+        return ResponseHandler.success(f"{len(promotions)} promotions", promotions)
+
+    @staticmethod
+    def create_promotion(db: Session, promotion: PromotionCreate):
+        if promotion.kind == "coupon" and not promotion.coupon_code:
+            ResponseHandler.bad_request_error("Coupon promotions require a coupon_code")
+        if promotion.kind == "bundle" and len(set(promotion.bundle_product_ids or [])) < 2:
+            ResponseHandler.bad_request_error("Bundle promotions require at least two bundle_product_ids")
+
+        db_promotion = Promotion(**promotion.model_dump())
+        if db_promotion.coupon_code:
+            db_promotion.coupon_code = db_promotion.coupon_code.upper()
+        db.add(db_promotion)
+        db.commit()
+        db.refresh(db_promotion)
+        PricingService.invalidate()
+        return ResponseHandler.create_success(db_promotion.name, db_promotion.id, db_promotion)
+
+    @staticmethod
+    def delete_promotion(db: Session, promotion_id: int):
+        db_promotion = db.query(Promotion).filter(Promotion.id == promotion_id).first()
+        if not db_promotion:
+            ResponseHandler.not_found_error("Promotion", promotion_id)
+        db.delete(db_promotion)
+        db.commit()
+        PricingService.invalidate()
+        return ResponseHandler.delete_success(db_promotion.name, db_promotion.id, db_promotion)
+
+    @staticmethod
+    def get_tax_rates(db: Session):
+        tax_rates = db.query(TaxRate).order_by(TaxRate.region.asc()).all()
+        return ResponseHandler.success(f"{len(tax_rates)} tax rates", tax_rates)
+
+    @staticmethod
+    def upsert_tax_rate(db: Session, tax_rate: TaxRateUpsert):
+        db_tax_rate = db.query(TaxRate).filter(TaxRate.region == tax_rate.region).first()
+        if db_tax_rate:
+            db_tax_rate.rate = tax_rate.rate
+        else:
+            db_tax_rate = TaxRate(region=tax_rate.region, rate=tax_rate.rate)
+            db.add(db_tax_rate)
+        db.commit()
+        db.refresh(db_tax_rate)
+        PricingService.invalidate()
+        return ResponseHandler.update_success("Tax rate", db_tax_rate.id, db_tax_rate)
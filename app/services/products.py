@@ -1,19 +1,33 @@
+from sqlalchemy import exists, func, select
 from sqlalchemy.orm import Session
-from app.models.models import Product, Category, ProductImage, User
-from app.schemas.products import ProductCreate, ProductUpdate
+from app.models.models import Product, Category, ProductImage, User, Cart, CartItem, Wishlist, wishlist_items
+from app.schemas.products import ProductCreate, ProductOut, ProductUpdate
 from app.utils.responses import ResponseHandler
+from app.utils.serialization import load_options
+from app.services.catalog import CatalogService
+from app.services.events import EventService
+from app.services.notifications import NotificationService
 from fastapi import UploadFile
 import shutil
 import os
 
 class ProductService:
     @staticmethod
-    def get_all_products(db: Session, page: int, limit: int, search: str = "", category_id: int | None = None, sort_by: str | None = None, sort_dir: str | None = "asc", current_user: User | None = None):
-        query = db.query(Product)
+    def get_all_products(db: Session, page: int, limit: int, search: str = "", category_id: int | None = None, sort_by: str | None = None, sort_dir: str | None = "asc", current_user: User | None = None, include: set[str] = frozenset(), fields: frozenset[str] | None = None):
+        # Per-user flags are computed as EXISTS columns of the listing query itself
+        flags = ProductService.membership_flags(current_user.id, include) if current_user and include else {}
+        # Only the requested columns and relationships are loaded
+        query = db.query(Product, *flags.values()).options(*load_options(Product, ProductOut, fields))
         if search:
             query = query.filter(Product.title.ilike(f"%{search}%"))
         if category_id is not None:
-            query = query.filter(Product.category_id == category_id)
+            # The category and all its descendants, one prefix match on the indexed path
+            path = CatalogService.get_category_path(db, category_id)
+            if path is None:
+                query = query.filter(Product.category_id == category_id)
+            else:
+                subtree = select(Category.id).where(Category.path.like(f"{path}%"))
+                query = query.filter(Product.category_id.in_(subtree))
         
         # Filter by is_available for non-admin users
         if current_user and current_user.role != "admin":
@@ -32,8 +46,30 @@ class ProductService:
         else:
             # For other cases, apply limit and offset for pagination
             products = query.limit(limit).offset((page - 1) * limit).all()
+
+        if flags:
+            rows, products = products, []
+            for product, *values in rows:
+                for name, value in zip(flags, values):
+                    setattr(product, name, value)
+                products.append(product)
         return {"message": f"Page {page} with {limit} products", "data": products}
 
+    @staticmethod
+    def membership_flags(user_id: int, include: set[str]):
+        flags = {}
+        if "wishlisted" in include:
+            wishlist_id = select(Wishlist.id).where(Wishlist.user_id == user_id).scalar_subquery()
+            flags["wishlisted"] = exists().where(
+                wishlist_items.c.wishlist_id == wishlist_id, wishlist_items.c.product_id == Product.id
+            ).label("wishlisted")
+        if "in_cart" in include:
+            cart_ids = select(Cart.id).where(Cart.user_id == user_id)
+            flags["in_cart"] = exists().where(
+                CartItem.cart_id.in_(cart_ids), CartItem.product_id == Product.id
+            ).label("in_cart")
+        return flags
+
     @staticmethod
     def get_product(db: Session, product_id: int):
         product = db.query(Product).filter(Product.id == product_id).first()
@@ -71,6 +107,7 @@ class ProductService:
             db.commit()
             db.refresh(db_product)
 
+        CatalogService.invalidate_categories()
         return ResponseHandler.create_success(db_product.title, db_product.id, db_product)
 
     @staticmethod
@@ -79,6 +116,9 @@ class ProductService:
         if not db_product:
             ResponseHandler.not_found_error("Product", product_id)
 
+        previous_stock = db_product.stock
+        previous_price = ProductService.effective_price(db_product)
+
         # Update product fields only if they are provided in the ProductUpdate schema
         for key, value in product_data.model_dump(exclude_unset=True).items():
             setattr(db_product, key, value)
@@ -89,6 +129,17 @@ class ProductService:
         else:
             db_product.is_available = False
 
+        if db_product.stock != previous_stock:
+            EventService.stock_changed(db, [db_product])
+
+        # Wishlisters are told about restocks and price drops by a background fan-out
+        if previous_stock <= 0 < db_product.stock:
+            NotificationService.product_changed(db, product_id, "back_in_stock", {"stock": db_product.stock})
+        price = ProductService.effective_price(db_product)
+        if price < previous_price:
+            NotificationService.product_changed(
+                db, product_id, "price_drop", {"old_price": previous_price, "new_price": price})
+
         # Handle thumbnail update
         if thumbnail is None:
             # If thumbnail is None, it means the existing thumbnail should be deleted
@@ -113,13 +164,19 @@ class ProductService:
                 image_url = f"/uploads/{image.filename}"
                 db_image = ProductImage(product_id=db_product.id, image_url=image_url)
                 db.add(db_image)
+            db_product.updated_at = func.clock_timestamp()
             db.commit()
             db.refresh(db_product)
 
         db.commit()
         db.refresh(db_product)
+        CatalogService.invalidate_product(product_id)
         return ResponseHandler.update_success(db_product.title, db_product.id, db_product)
 
+    @staticmethod
+    def effective_price(product: Product) -> float:
+        return round(product.price * (1 - product.discount_percentage / 100), 2)
+
     @staticmethod
     def delete_product(db: Session, product_id: int):
         db_product = db.query(Product).filter(Product.id == product_id).first()
@@ -127,6 +184,7 @@ class ProductService:
             ResponseHandler.not_found_error("Product", product_id)
         db.delete(db_product)
         db.commit()
+        CatalogService.invalidate_product(product_id)
         return ResponseHandler.delete_success(db_product.title, db_product.id, db_product)
 
     @staticmethod
@@ -150,5 +208,7 @@ class ProductService:
             pass
 
         db.delete(image_to_delete)
+        # Images are part of the product's representation, so its validators must change
+        db_product.updated_at = func.clock_timestamp()
         db.commit()
 
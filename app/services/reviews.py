@@ -3,22 +3,36 @@ from app.models.models import Review, Product, User
 from app.schemas.products import ReviewCreate
 from app.utils.responses import ResponseHandler
 from fastapi import HTTPException, status
-from sqlalchemy import func
+from sqlalchemy import Float, case, cast, func, or_, select, tuple_, update
+from app.utils.pagination import decode_cursor, next_cursor
+from app.db.database import SessionLocal
+from datetime import datetime
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Histogram column of each star rating on Product
+RATING_COUNT_COLUMNS = {stars: f"rating_{stars}_count" for stars in range(1, 6)}
+
 
 class ReviewService:
     @staticmethod
     async def create_review(db: Session, review: ReviewCreate, user_id: int):
-        # Check if product exists
-        product = db.query(Product).filter(Product.id == review.product_id).first()
-        if not product:
+        # Bump the product's aggregates in place. The row lock it takes also serializes two
+        # reviews of the same product by one user, so the duplicate check below can't race.
+        updated = ReviewService.add_to_aggregates(db, review.product_id, review.rating)
+        if updated is None:
+            db.rollback()
             ResponseHandler.not_found_error("Product", review.product_id)
 
         # Check if user has already reviewed this product (optional, but good practice)
-        existing_review = db.query(Review).filter(
+        existing_review = db.query(Review.id).filter(
             Review.product_id == review.product_id,
             Review.user_id == user_id
         ).first()
         if existing_review:
+            db.rollback()
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="You have already reviewed this product.")
 
         db_review = Review(
@@ -29,18 +43,110 @@ class ReviewService:
         db.commit()
         db.refresh(db_review)
 
-        # Update product's average rating and review count
-        product.review_count = db.query(Review).filter(Review.product_id == product.id).count()
-        product.average_rating = db.query(func.avg(Review.rating)).filter(Review.product_id == product.id).scalar()
-        db.commit()
-        db.refresh(product)
-
         return db_review
 
+    # One atomic UPDATE of the count, sum, average and histogram, returns None if the product doesn't exist
     @staticmethod
-    async def get_reviews_for_product(db: Session, product_id: int):
-        reviews = db.query(Review).filter(Review.product_id == product_id).all()
-        return reviews
+    def add_to_aggregates(db: Session, product_id: int, rating: int, sign: int = 1):
+        rating_count = getattr(Product, RATING_COUNT_COLUMNS[rating])
+        review_count = Product.review_count + sign
+        rating_sum = Product.rating_sum + rating * sign
+        return db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values({
+                Product.review_count: review_count,
+                Product.rating_sum: rating_sum,
+                rating_count: rating_count + sign,
+                Product.average_rating: case(
+                    (review_count > 0, cast(rating_sum, Float) / review_count), else_=0.0),
+            })
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+
+    # Recompute the aggregates from the reviews table and repair the products that drifted
+    @staticmethod
+    def reconcile_aggregates(db: Session, product_ids: list[int] | None = None) -> list[int]:
+        actual = (
+            select(
+                Product.id.label("product_id"),
+                func.count(Review.rating).label("review_count"),
+                func.coalesce(func.sum(Review.rating), 0).label("rating_sum"),
+                *[
+                    func.count(Review.id).filter(Review.rating == stars).label(column)
+                    for stars, column in RATING_COUNT_COLUMNS.items()
+                ],
+            )
+            .outerjoin(Review, Review.product_id == Product.id)
+            .group_by(Product.id)
+        )
+        if product_ids is not None:
+            actual = actual.where(Product.id.in_(product_ids))
+        actual = actual.subquery("actual")
+
+        columns = ["review_count", "rating_sum", *RATING_COUNT_COLUMNS.values()]
+        repaired = db.scalars(
+            update(Product)
+            .where(
+                Product.id == actual.c.product_id,
+                or_(*[getattr(Product, column) != actual.c[column] for column in columns]),
+            )
+            .values({
+                **{column: actual.c[column] for column in columns},
+                "average_rating": case(
+                    (actual.c.review_count > 0, cast(actual.c.rating_sum, Float) / actual.c.review_count), else_=0.0),
+            })
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        if repaired:
+            logger.warning("Repaired review aggregates of %d products: %s", len(repaired), repaired)
+        return repaired
+
+    # Cursor-paginated reviews of a product, newest first or by rating, with the precomputed summary
+    @staticmethod
+    async def get_reviews_for_product(db: Session, product_id: int, limit: int, cursor: str | None = None, sort: str = "newest", stars: int | None = None):
+        aggregates = db.execute(
+            select(Product.review_count, Product.rating_sum, *[getattr(Product, column) for column in RATING_COUNT_COLUMNS.values()])
+            .where(Product.id == product_id)
+        ).first()
+        if not aggregates:
+            ResponseHandler.not_found_error("Product", product_id)
+
+        query = db.query(Review).filter(Review.product_id == product_id)
+        if stars is not None:
+            query = query.filter(Review.rating == stars)
+
+        if sort == "newest":
+            sort_column = Review.created_at
+            query = query.order_by(Review.created_at.desc(), Review.id.desc())
+        elif sort == "highest":
+            sort_column = Review.rating
+            query = query.order_by(Review.rating.desc(), Review.id.desc())
+        else:
+            sort_column = Review.rating
+            query = query.order_by(Review.rating.asc(), Review.id.asc())
+
+        if cursor:
+            value, review_id = decode_cursor(cursor, as_datetime=sort == "newest")
+            if sort == "lowest":
+                query = query.filter(tuple_(sort_column, Review.id) > (value, review_id))
+            else:
+                query = query.filter(tuple_(sort_column, Review.id) < (value, review_id))
+
+        reviews, cursor = next_cursor(
+            query.limit(limit + 1).all(), limit, lambda review: (getattr(review, sort_column.key), review.id))
+
+        review_count, rating_sum = aggregates.review_count, aggregates.rating_sum
+        summary = {
+            "product_id": product_id,
+            "review_count": review_count,
+            "average_rating": round(rating_sum / review_count, 2) if review_count else 0.0,
+            "histogram": {stars: aggregates._mapping[column] for stars, column in RATING_COUNT_COLUMNS.items()},
+        }
+        return {"message": f"{len(reviews)} reviews", "data": reviews, "summary": summary, "next_cursor": cursor}
 
     @staticmethod
     async def get_reviews_by_user(db: Session, user_id: int):
@@ -48,6 +154,50 @@ class ReviewService:
         return reviews
     
     @staticmethod
-    async def get_all_reviews(db: Session):
-        reviews = db.query(Review).options(joinedload(Review.product)).all()
-        return reviews
+    def feed_filters(product_id: int | None = None, user_id: int | None = None, rating: int | None = None,
+                     created_from: datetime | None = None, created_to: datetime | None = None):
+        filters = []
+        if product_id is not None:
+            filters.append(Review.product_id == product_id)
+        if user_id is not None:
+            filters.append(Review.user_id == user_id)
+        if rating is not None:
+            filters.append(Review.rating == rating)
+        if created_from:
+            filters.append(Review.created_at >= created_from)
+        if created_to:
+            filters.append(Review.created_at < created_to)
+        return filters
+
+    # Admin review feed, newest first, one keyset page at a time
+    @staticmethod
+    async def get_all_reviews(db: Session, limit: int, cursor: str | None = None, **filters):
+        query = (
+            db.query(Review)
+            .options(joinedload(Review.product).load_only(Product.id, Product.title))
+            .filter(*ReviewService.feed_filters(**filters))
+            .order_by(Review.created_at.desc(), Review.id.desc())
+        )
+        if cursor:
+            created_at, review_id = decode_cursor(cursor)
+            query = query.filter(tuple_(Review.created_at, Review.id) < (created_at, review_id))
+
+        reviews, cursor = next_cursor(query.limit(limit + 1).all(), limit, lambda review: (review.created_at, review.id))
+        return {"message": f"{len(reviews)} reviews", "data": reviews, "next_cursor": cursor}
+
+    # Every matching review as NDJSON, streamed from a server-side cursor in batches
+    @staticmethod
+    def export_reviews(batch_size: int = 1000, **filters):
+        query = (
+            select(
+                Review.id, Review.product_id, Product.title.label("product_title"), Review.user_id,
+                Review.rating, Review.comment, Review.created_at,
+            )
+            .join(Product, Product.id == Review.product_id)
+            .where(*ReviewService.feed_filters(**filters))
+            .order_by(Review.created_at.desc(), Review.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        with SessionLocal() as db:
+            for partition in db.execute(query).partitions():
+                yield "".join(json.dumps(dict(row._mapping), default=str) + "\n" for row in partition)
@@ -1,26 +1,48 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.models import User
-from app.schemas.users import UserCreate, UserUpdate
+from app.schemas.users import AdminBase, UserBase, UserCreate, UserUpdate
+from app.utils.cache import TTLCache
 from app.utils.responses import ResponseHandler
 from app.core.security import get_password_hash
+from app.utils.serialization import load_options
+
+# The profile is the user's own columns, without the cart graph
+PROFILE_FIELDS = frozenset(AdminBase.model_fields)
 
 
 class UserService:
+    _profiles = TTLCache(settings.profile_cache_ttl_seconds)
+
     @staticmethod
-    def get_all_users(db: Session, page: int, limit: int, search: str = "", role: str = None):
-        query = db.query(User).order_by(User.id.asc()).filter(User.username.contains(search))
+    def get_all_users(db: Session, page: int, limit: int, search: str = "", role: str = None, fields: frozenset[str] | None = None):
+        query = db.query(User).options(*load_options(User, UserBase, fields)).order_by(User.id.asc()).filter(User.username.contains(search))
         if role:
             query = query.filter(User.role == role)
         users = query.limit(limit).offset((page - 1) * limit).all()
         return users
 
     @staticmethod
-    def get_user(db: Session, user_id: int):
-        user = db.query(User).options(joinedload(User.carts)).filter(User.id == user_id).first()
+    def get_user(db: Session, user_id: int, fields: frozenset[str] | None = None):
+        user = db.query(User).options(*load_options(User, UserBase, fields)).filter(User.id == user_id).first()
         if not user:
             ResponseHandler.not_found_error("User", user_id)
         return user
 
+    # Profile projection, cached per user until update_user or delete_user changes it. None for a missing user.
+    # The cache is per process: other gunicorn workers keep the old profile for up to profile_cache_ttl_seconds.
+    @staticmethod
+    def get_profile(db: Session, user_id: int) -> dict | None:
+        profile = UserService._profiles.get(user_id)
+        if profile is None:
+            row = db.execute(select(*(getattr(User, name) for name in PROFILE_FIELDS)).where(User.id == user_id)).first()
+            if row is None:
+                return None
+            profile = dict(row._mapping)
+            UserService._profiles.set(user_id, profile)
+        return profile
+
     @staticmethod
     def create_user(db: Session, user: UserCreate):
         hashed_password = get_password_hash(user.password)
@@ -47,6 +69,7 @@ class UserService:
 
         db.commit()
         db.refresh(db_user)
+        UserService._profiles.invalidate(user_id)
         return db_user
 
     @staticmethod
@@ -56,4 +79,5 @@ class UserService:
             ResponseHandler.not_found_error("User", user_id)
         db.delete(db_user)
         db.commit()
+        UserService._profiles.invalidate(user_id)
         return db_user
@@ -1,5 +1,7 @@
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from app.models.models import Wishlist, Product
+from app.models.models import Wishlist, Product, wishlist_items
 from app.utils.responses import ResponseHandler
 
 class WishlistService:
@@ -14,39 +16,86 @@ class WishlistService:
             db.refresh(wishlist)
         return wishlist
 
+    # Add products with a single statement that also creates the wishlist on first use.
+    # Returns (added, already_present, not_found) product ids.
     @staticmethod
-    def add_to_wishlist(db: Session, user_id: int, product_id: int):
-        wishlist = db.query(Wishlist).filter(Wishlist.user_id == user_id).first()
-        if not wishlist:
-            wishlist = Wishlist(user_id=user_id)
-            db.add(wishlist)
-            db.commit()
-            db.refresh(wishlist)
-
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if not product:
-            ResponseHandler.not_found_error("Product", product_id)
+    def add_products(db: Session, user_id: int, product_ids: list[int]):
+        product_ids = list(dict.fromkeys(product_ids))
+        # The no-op update makes RETURNING yield the id of an existing wishlist as well
+        wishlist = (
+            insert(Wishlist)
+            .values(user_id=user_id)
+            .on_conflict_do_update(index_elements=[Wishlist.user_id], set_={"user_id": user_id})
+            .returning(Wishlist.id)
+            .cte("wishlist")
+        )
+        added = (
+            insert(wishlist_items)
+            .from_select(
+                ["wishlist_id", "product_id"],
+                select(wishlist.c.id, Product.id).where(Product.id.in_(product_ids)),
+            )
+            .on_conflict_do_nothing()
+            .returning(wishlist_items.c.product_id)
+            .cte("added")
+        )
+        rows = db.execute(
+            select(Product.id, added.c.product_id.is_not(None).label("added"))
+            .outerjoin(added, added.c.product_id == Product.id)
+            .where(Product.id.in_(product_ids))
+        ).all()
+        db.commit()
 
-        if product in wishlist.products:
-            ResponseHandler.bad_request_error("Product already in wishlist")
+        existing = {row.id: row.added for row in rows}
+        return (
+            [product_id for product_id in product_ids if existing.get(product_id) is True],
+            [product_id for product_id in product_ids if existing.get(product_id) is False],
+            [product_id for product_id in product_ids if product_id not in existing],
+        )
 
-        wishlist.products.append(product)
+    # Remove products with one DELETE ... RETURNING, returns (removed, not_in_wishlist) product ids
+    @staticmethod
+    def remove_products(db: Session, user_id: int, product_ids: list[int]):
+        product_ids = list(dict.fromkeys(product_ids))
+        removed = set(db.scalars(
+            delete(wishlist_items)
+            .where(
+                wishlist_items.c.wishlist_id == Wishlist.id,
+                Wishlist.user_id == user_id,
+                wishlist_items.c.product_id.in_(product_ids),
+            )
+            .returning(wishlist_items.c.product_id)
+        ).all())
         db.commit()
-        return {"message": "Product added to wishlist"}
+        return (
+            [product_id for product_id in product_ids if product_id in removed],
+            [product_id for product_id in product_ids if product_id not in removed],
+        )
 
     @staticmethod
-    def remove_from_wishlist(db: Session, user_id: int, product_id: int):
-        wishlist = db.query(Wishlist).filter(Wishlist.user_id == user_id).first()
-        if not wishlist:
-            ResponseHandler.not_found_error("Wishlist for user", user_id)
-
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if not product:
+    def add_to_wishlist(db: Session, user_id: int, product_id: int):
+        added, already_present, not_found = WishlistService.add_products(db, user_id, [product_id])
+        if not_found:
             ResponseHandler.not_found_error("Product", product_id)
+        if already_present:
+            ResponseHandler.bad_request_error("Product already in wishlist")
+        return {"message": "Product added to wishlist"}
 
-        if product not in wishlist.products:
+    @staticmethod
+    def remove_from_wishlist(db: Session, user_id: int, product_id: int):
+        removed, not_in_wishlist = WishlistService.remove_products(db, user_id, [product_id])
+        if not_in_wishlist:
             ResponseHandler.bad_request_error("Product not in wishlist")
-
-        wishlist.products.remove(product)
-        db.commit()
         return {"message": "Product removed from wishlist"}
+
+    @staticmethod
+    def bulk_add(db: Session, user_id: int, product_ids: list[int]):
+        added, already_present, not_found = WishlistService.add_products(db, user_id, product_ids)
+        data = {"added": added, "already_present": already_present, "not_found": not_found}
+        return ResponseHandler.success(f"{len(added)} products added to wishlist", data)
+
+    @staticmethod
+    def bulk_remove(db: Session, user_id: int, product_ids: list[int]):
+        removed, not_in_wishlist = WishlistService.remove_products(db, user_id, product_ids)
+        data = {"removed": removed, "not_in_wishlist": not_in_wishlist}
+        return ResponseHandler.success(f"{len(removed)} products removed from wishlist", data)
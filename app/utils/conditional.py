@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable
+import hashlib
+from fastapi import Request, Response, status
+
+
+def weak_etag(*parts) -> str:
+    return 'W/"' + hashlib.sha1(repr(parts).encode()).hexdigest()[:20] + '"'
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    """If-None-Match wins over If-Modified-Since, as in RFC 9110. ETags compare weakly."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            # "-0000" or a missing zone, HTTP dates are GMT anyway
+            since = since.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have whole seconds
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_response(request: Request, etag: str, last_modified: datetime | None, render: Callable[[], Response]) -> Response:
+    """Answer 304 from the validators alone, only calling `render` when the client's copy is stale."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        # timestamptz columns come back in the session's time zone
+        last_modified = last_modified.astimezone(timezone.utc) if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response = render()
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,31 @@
+from datetime import datetime
+import base64
+import json
+from app.utils.responses import ResponseHandler
+
+
+# Opaque keyset cursors, encoding the sort value and id of the last row of a page
+def encode_cursor(value, id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, as_datetime: bool = True):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, id = json.loads(raw)
+        if as_datetime:
+            value = datetime.fromisoformat(value)
+        return value, int(id)
+    except (ValueError, TypeError):
+        ResponseHandler.bad_request_error("Invalid cursor")
+
+
+def next_cursor(rows, limit: int, key):
+    # Rows are fetched with limit + 1, an extra row means there is another page
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
@@ -0,0 +1,102 @@
+import argparse
+import logging
+import time
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.services.analytics import AnalyticsService
+from app.services.jobs import JobService
+from app.services.notifications import NotificationService
+from app.services.partitions import PartitionService
+from app.services.orders import OrderService
+
+logger = logging.getLogger("app.worker")
+
+# How often a worker makes sure next months' order partitions exist
+PARTITION_CHECK_INTERVAL = 6 * 60 * 60
+
+
+# Job kinds and the service method that processes each of them
+JOB_HANDLERS = {
+    "order.payment": OrderService.process_payment,
+    "order.notification": OrderService.send_notification,
+    "analytics.order": AnalyticsService.record_order_job,
+    "wishlist.fanout": NotificationService.fan_out,
+    "wishlist.digest": NotificationService.send_digests,
+}
+
+
+class WorkerMetrics:
+    def __init__(self, report_interval: float = 30.0):
+        self.report_interval = report_interval
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.monotonic()
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.by_kind = {}
+
+    def record(self, kind: str, seconds: float, ok: bool):
+        self.processed += 1
+        self.failed += 0 if ok else 1
+        self.busy_seconds += seconds
+        self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+
+    def maybe_report(self):
+        elapsed = time.monotonic() - self.started_at
+        if elapsed < self.report_interval:
+            return
+        if self.processed:
+            logger.info(
+                "processed %d jobs in %.1fs (%.1f jobs/s, %.1f ms avg, %d failed) %s",
+                self.processed, elapsed, self.processed / elapsed,
+                self.busy_seconds / self.processed * 1000, self.failed, self.by_kind)
+        self.reset()
+
+
+def run_job(db, job, metrics: WorkerMetrics):
+    started = time.monotonic()
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for job kind {job.kind}")
+        handler(db, job.payload)
+        JobService.complete(db, job)
+        metrics.record(job.kind, time.monotonic() - started, ok=True)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+        JobService.fail(db, job, repr(e))
+        metrics.record(job.kind, time.monotonic() - started, ok=False)
+
+
+def run_worker(batch_size: int, poll_interval: float, once: bool = False):
+    metrics = WorkerMetrics()
+    partitions_checked_at = None
+    while True:
+        if partitions_checked_at is None or time.monotonic() - partitions_checked_at > PARTITION_CHECK_INTERVAL:
+            with SessionLocal() as db:
+                PartitionService.ensure_partitions(db, settings.order_partition_months_ahead)
+            partitions_checked_at = time.monotonic()
+
+        with SessionLocal() as db:
+            jobs = JobService.claim(db, batch_size)
+            for job in jobs:
+                run_job(db, job, metrics)
+        metrics.maybe_report()
+        if once:
+            return
+        if not jobs:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process background jobs from the jobs table")
+    parser.add_argument("--batch-size", type=int, default=settings.job_batch_size)
+    parser.add_argument("--poll-interval", type=float, default=settings.job_poll_interval_seconds)
+    parser.add_argument("--once", action="store_true", help="Process one batch and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    run_worker(args.batch_size, args.poll_interval, args.once)
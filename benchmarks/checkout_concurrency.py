@@ -0,0 +1,124 @@
+"""Parallel checkouts racing for the last units of a product: none may oversell or deadlock.
+
+    python -m benchmarks.checkout_concurrency [--checkouts 200] [--stock 10] [--connections 50]
+
+Needs a migrated Postgres database in DATABASE_URL. Use a scratch one: every run creates a
+category, two products and one user with a cart per checkout, and leaves the orders behind.
+Every cart holds one unit of the scarce product and one of a plentiful one, added in random
+order, so checkouts also contend on row locks across products. Exits 1 if the scarce
+product oversold, its stock went negative or any checkout failed with something other than
+the out of stock error."""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+import argparse
+import random
+import sys
+import time
+import uuid
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.models.models import Cart, CartItem, Category, OrderItem, Product, User
+from app.schemas.orders import OrderCreate
+from app.services.orders import OrderService
+from app.services.partitions import PartitionService
+
+
+def new_product(title: str, stock: int, category_id: int) -> Product:
+    return Product(title=title, description="Checkout concurrency check", price=20.0, discount_percentage=0.0, rating=0.0,
+                   stock=stock, brand="bench", thumbnail="/uploads/bench.png", category_id=category_id,
+                   is_available=True, is_published=True)
+
+
+def setup(Session, checkouts: int, stock: int) -> tuple[int, int, list[int]]:
+    run = uuid.uuid4().hex[:8]
+    rng = random.Random(run)
+    with Session() as db:
+        PartitionService.ensure_partitions(db, 1)
+        category = Category(name=f"bench-{run}", path="")
+        db.add(category)
+        db.flush()
+        category.path = f"{category.id}/"
+        scarce, plenty = new_product(f"scarce-{run}", stock, category.id), new_product(f"plenty-{run}", checkouts * 2, category.id)
+        db.add_all([scarce, plenty])
+        db.flush()
+
+        user_ids = []
+        for i in range(checkouts):
+            user = User(username=f"bench-{run}-{i}", email=f"bench-{run}-{i}@example.com", password="-", full_name="Bench")
+            db.add(user)
+            db.flush()
+            lines = [(scarce.id, 1), (plenty.id, 1)]
+            rng.shuffle(lines)
+            db.add(Cart(user_id=user.id, total_amount=40.0, cart_items=[
+                CartItem(product_id=product_id, quantity=quantity, subtotal=20.0 * quantity) for product_id, quantity in lines]))
+            user_ids.append(user.id)
+        db.commit()
+        return scarce.id, plenty.id, user_ids
+
+
+def checkout(Session, barrier: Barrier, user_id: int) -> tuple[str, float]:
+    barrier.wait()
+    started = time.perf_counter()
+    with Session() as db:
+        try:
+            OrderService.create_order(db, user_id, OrderCreate(address="1 Bench Street", payment_method="card"))
+            outcome = "ordered"
+        except HTTPException as e:
+            outcome = "out of stock" if e.status_code == 400 else f"HTTP {e.status_code}"
+        except DBAPIError as e:
+            db.rollback()
+            outcome = "deadlock" if "deadlock" in str(e.orig).lower() else f"db error: {type(e.orig).__name__}"
+    return outcome, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checkouts", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=10, help="Units of the scarce product")
+    parser.add_argument("--connections", type=int, default=50, help="Pool size, keep it under the server's max_connections")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url, pool_size=args.connections, max_overflow=0, pool_timeout=300)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    scarce_id, plenty_id, user_ids = setup(Session, args.checkouts, args.stock)
+
+    barrier = Barrier(len(user_ids))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(user_ids)) as pool:
+        results = list(pool.map(lambda user_id: checkout(Session, barrier, user_id), user_ids))
+    elapsed = time.perf_counter() - started
+
+    with Session() as db:
+        stock = {row.id: row.stock for row in db.execute(select(Product.id, Product.stock).where(Product.id.in_([scarce_id, plenty_id])))}
+        sold = db.scalar(select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.product_id == scarce_id))
+
+    outcomes = Counter(outcome for outcome, _ in results)
+    latencies = sorted(latency for _, latency in results)
+    print(f"{args.checkouts} checkouts for {args.stock} units over {args.connections} connections in {elapsed:.2f}s, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms")
+    for outcome, count in outcomes.most_common():
+        print(f"  {count:>5}  {outcome}")
+    print(f"  scarce product: {sold} units in orders, stock left {stock[scarce_id]}")
+    print(f"  plenty product: stock left {stock[plenty_id]} of {args.checkouts * 2}")
+
+    problems = []
+    if sold > args.stock or stock[scarce_id] < 0:
+        problems.append("oversold")
+    if outcomes["ordered"] != min(args.stock, args.checkouts) or sold != outcomes["ordered"]:
+        problems.append(f"{outcomes['ordered']} orders for {min(args.stock, args.checkouts)} units")
+    if stock[scarce_id] != args.stock - sold or stock[plenty_id] != args.checkouts * 2 - sold:
+        problems.append("stock does not match the orders")
+    if set(outcomes) - {"ordered", "out of stock"}:
+        problems.append("unexpected failures")
+    if problems:
+        print("FAILED: " + ", ".join(problems), file=sys.stderr)
+        sys.exit(1)
+    print("OK: no oversell, no deadlocks")
+
+
+if __name__ == "__main__":
+    main()
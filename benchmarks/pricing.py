@@ -0,0 +1,94 @@
+"""Carts priced per second by the compiled PricingEngine, on one core.
+
+    python -m benchmarks.pricing [--carts 10000] [--products 500] [--promotions 200] [--repeat 5]
+
+Promotions and products are built in memory, so no database is needed. The target is
+10k carts per second."""
+from types import SimpleNamespace
+import argparse
+import random
+import time
+from app.models.models import Promotion
+from app.services.pricing import PricingEngine
+
+TARGET_CARTS_PER_SECOND = 10_000
+
+
+def build_products(count: int) -> dict[int, SimpleNamespace]:
+    rng = random.Random(1)
+    return {
+        product_id: SimpleNamespace(price=round(rng.uniform(10, 200), 2), discount_percentage=rng.choice([0, 0, 5, 10, 20]),
+                                    category_id=product_id % 20 + 1)
+        for product_id in range(1, count + 1)
+    }
+
+
+def build_promotions(count: int, products: int) -> list[Promotion]:
+    rng = random.Random(2)
+    promotions = [Promotion(kind="coupon", coupon_code="SAVE10", min_subtotal=50, discount_percentage=10, is_active=True)]
+    for i in range(count):
+        kind = ("tiered", "tiered", "bundle")[i % 3]
+        if kind == "bundle":
+            promotions.append(Promotion(kind="bundle", discount_percentage=15, is_active=True,
+                                        bundle_product_ids=rng.sample(range(1, products + 1), 2)))
+        elif i % 2:
+            promotions.append(Promotion(kind="tiered", product_id=rng.randint(1, products), min_quantity=rng.randint(2, 5),
+                                        discount_percentage=rng.choice([5, 10, 15]), is_active=True))
+        else:
+            promotions.append(Promotion(kind="tiered", category_id=rng.randint(1, 20), min_quantity=rng.randint(2, 5),
+                                        discount_percentage=rng.choice([5, 10]), is_active=True))
+    return promotions
+
+
+def build_carts(count: int, products: int) -> list[list[tuple[int, int]]]:
+    rng = random.Random(3)
+    return [
+        [(rng.randint(1, products), rng.randint(1, 4)) for _ in range(rng.randint(1, 8))]
+        for _ in range(count)
+    ]
+
+
+def check_split_bundle_lines(engine: PricingEngine, products: dict[int, SimpleNamespace]):
+    """A bundle counted over several lines of one product must not push any line below zero."""
+    bundle_ids = next(bundle for bundles in engine.bundles_by_product.values() for bundle in bundles)[0]
+    first, second = bundle_ids[0], bundle_ids[1]
+    priced = engine.price_cart([(first, 1), (first, 1), (first, 3), (second, 5)], products)
+    assert all(line.subtotal >= 0 for line in priced.lines), priced.lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--carts", type=int, default=10_000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--promotions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    products = build_products(args.products)
+    promotions = build_promotions(args.promotions, args.products)
+    carts = build_carts(args.carts, args.products)
+
+    started = time.perf_counter()
+    engine = PricingEngine(promotions, {"eu": 0.2, "us-ca": 0.0725}, 0.10)
+    compiled = time.perf_counter() - started
+    check_split_bundle_lines(engine, products)
+
+    print(f"{len(promotions)} promotions compiled in {compiled * 1000:.2f} ms, {args.carts} carts of 1-8 lines")
+    print(f"{'coupon':<10}{'ms/batch':>10}{'carts/s':>12}")
+    worst = None
+    for coupon in (None, "SAVE10"):
+        engine.price_carts(carts, products, coupon, "eu")
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            engine.price_carts(carts, products, coupon, "eu")
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        rate = args.carts / best
+        worst = rate if worst is None else min(worst, rate)
+        print(f"{coupon or '-':<10}{best * 1000:>10.1f}{rate:>12.0f}")
+    print(f"{'target':<10}{'':>10}{TARGET_CARTS_PER_SECOND:>12}  {'met' if worst >= TARGET_CARTS_PER_SECOND else 'missed'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compare response encoding of the list endpoints: FastAPI's response_model path against TrustedJSONResponse.
+
+    python -m benchmarks.serialization [--rows 100] [--repeat 200]
+
+Payloads are built from unsaved ORM objects, so no database is needed."""
+from datetime import datetime, timedelta, timezone
+import argparse
+import time
+import tracemalloc
+from pydantic import TypeAdapter
+from app.models.models import Cart, CartItem, Category, Order, OrderItem, Product, ProductImage
+from app.schemas.carts import CartsOutList
+from app.schemas.orders import OrdersOut, OrderSummariesOut
+from app.schemas.products import ProductsOut
+from app.utils.serialization import dump_json
+
+
+def build_products(count: int) -> list[Product]:
+    category = Category(id=1, name="Hoodies", thumbnail="/uploads/hoodies.png", parent_id=None, path="1/")
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        Product(
+            id=i, title=f"Oversized hoodie {i}", description="Heavyweight cotton fleece with a kangaroo pocket.",
+            price=59.0 + i % 40, discount_percentage=float(i % 30), rating=4.5, stock=i % 12, brand="StreetO'Wear",
+            thumbnail=f"/uploads/product_{i}.png", is_published=True, created_at=created_at + timedelta(minutes=i),
+            category_id=category.id, category=category,
+            images=[ProductImage(id=i * 10 + n, product_id=i, image_url=f"/uploads/product_{i}_{n}.png") for n in range(4)],
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def build_carts(products: list[Product], count: int) -> list[Cart]:
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    carts = []
+    for i in range(1, count + 1):
+        items = [
+            CartItem(id=i * 10 + n, product_id=product.id, quantity=n + 1, subtotal=product.price * (n + 1), product=product)
+            for n, product in enumerate(products[i % len(products):][:5])
+        ]
+        carts.append(Cart(id=i, user_id=1, created_at=created_at, total_amount=sum(item.subtotal for item in items), cart_items=items))
+    return carts
+
+
+def build_orders(products: list[Product], count: int) -> list[Order]:
+    orders = []
+    for i in range(1, count + 1):
+        created_at = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(hours=i)
+        items = [
+            OrderItem(id=i * 10 + n, order_created_at=created_at, product_id=product.id, quantity=1, subtotal=product.price, product=product)
+            for n, product in enumerate(products[i % len(products):][:3])
+        ]
+        order = Order(id=i, user_id=1, created_at=created_at, total_amount=sum(item.subtotal for item in items),
+                      status="delivered", payment_method="card", order_items=items)
+        orders.append(order)
+    return orders
+
+
+# The summary view selects plain rows without the nested items
+def build_order_summaries(orders: list[Order]) -> list[dict]:
+    return [
+        {"id": order.id, "user_id": order.user_id, "total_amount": order.total_amount, "status": order.status,
+         "created_at": order.created_at, "payment_method": order.payment_method, "item_count": len(order.order_items)}
+        for order in orders
+    ]
+
+
+# FastAPI with a response_model: validate with from_attributes, then let Pydantic dump JSON bytes
+def response_model_path(model):
+    adapter = TypeAdapter(model)
+    return lambda content: adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def trusted_path(model):
+    return lambda content: dump_json(model, content)
+
+
+def measure(encode, content, repeat: int):
+    encode(content)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode(content)
+    elapsed = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    encode(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    products = build_products(args.rows)
+    orders = build_orders(products, args.rows)
+    payloads = [
+        ("products", ProductsOut, ProductsOut, {"message": "products", "data": products}),
+        ("carts", CartsOutList, CartsOutList, {"message": "carts", "data": build_carts(products, args.rows)}),
+        # The order routes declare OrdersOut | OrderSummariesOut, which FastAPI validates as a union
+        ("orders", OrdersOut | OrderSummariesOut, OrdersOut, {"message": "orders", "data": orders}),
+        ("order summaries", OrdersOut | OrderSummariesOut, OrderSummariesOut, {"message": "orders", "data": build_order_summaries(orders)}),
+    ]
+
+    print(f"{'payload':<16}{'path':<16}{'ms/op':>10}{'peak KiB':>12}{'bytes':>10}")
+    for name, route_model, model, content in payloads:
+        paths = (("response_model", response_model_path(route_model)), ("trusted", trusted_path(model)))
+        outputs = [encode(content) for _, encode in paths]
+        assert outputs[0] == outputs[1], f"{name}: encodings differ"
+        results = []
+        for label, encode in paths:
+            elapsed, peak = measure(encode, content, args.repeat)
+            results.append(elapsed)
+            print(f"{name:<16}{label:<16}{elapsed * 1000:>10.3f}{peak / 1024:>12.1f}{len(outputs[0]):>10}")
+        print(f"{'':<16}{'speedup':<16}{results[0] / results[1]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
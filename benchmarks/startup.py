@@ -0,0 +1,144 @@
+"""Cold start profile of the API: where the time goes between starting Python and serving.
+
+    python -m benchmarks.startup [--runs 5] [--top 15] [--budget-ms 1500] [--json]
+
+Each run is a fresh interpreter under `-X importtime`. The report breaks the time down into
+startup phases, import time per package and the slowest modules, medians over the runs.
+The components created on first use (DB engine, password hashing) are timed separately.
+With --budget-ms the exit code is 1 when the cold start, importing app.main plus the lifespan
+startup, goes over the budget, so CI can keep it from creeping up."""
+from statistics import median
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Cold start measured on a 1 CPU container after moving the DB engine and passlib to first use, with headroom
+COLD_START_BUDGET_MS = 1500
+
+# Runs in the fresh interpreter, the phase timings come back as JSON on stdout
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+phases = {"import app.main": imported - started}
+
+async def serve():
+    lifespan = app.main.app.router.lifespan_context(app.main.app)
+    begin = time.perf_counter()
+    await lifespan.__aenter__()
+    phases["lifespan startup"] = time.perf_counter() - begin
+
+    from app.db.database import get_engine
+    from app.core.security import get_password_context
+    for name, init in (("first use: DB engine", get_engine), ("first use: password context", get_password_context)):
+        begin = time.perf_counter()
+        init()
+        phases[name] = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    await lifespan.__aexit__(None, None, None)
+    phases["lifespan shutdown"] = time.perf_counter() - begin
+
+asyncio.run(serve())
+print(json.dumps({name: seconds * 1000 for name, seconds in phases.items()}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, float, float]]:
+    """(module, depth, self ms, cumulative ms) per line of `-X importtime` output, in import order."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), depth, int(self_us) / 1000, int(cumulative_us) / 1000))
+    return modules
+
+
+def package_of(module: str) -> str:
+    top = module.split(".")[0]
+    if top == "app":
+        return ".".join(module.split(".")[:2])
+    return "(stdlib)" if top in sys.stdlib_module_names or top.startswith("_") else top
+
+
+def profile_once() -> dict:
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-W", "ignore", "-c", PROBE],
+                            capture_output=True, text=True, env=os.environ.copy())
+    wall = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr[-3000:]}")
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+    packages: dict[str, float] = {}
+    for module, _, self_ms, _ in modules:
+        packages[package_of(module)] = packages.get(package_of(module), 0.0) + self_ms
+    return {
+        "process_ms": wall,
+        "cold_start_ms": phases["import app.main"] + phases["lifespan startup"],
+        "phases": phases,
+        "packages": packages,
+        "modules": {module: self_ms for module, _, self_ms, _ in modules},
+        "app_modules": {module: cumulative for module, _, _, cumulative in modules if module.startswith("app.")},
+    }
+
+
+def median_of(runs: list[dict], key: str) -> dict[str, float]:
+    names = dict.fromkeys(name for run in runs for name in run[key])
+    return {name: median(run[key].get(name, 0.0) for run in runs) for name in names}
+
+
+def summarize(runs: list[dict], top: int) -> dict:
+    by_time = lambda values: dict(sorted(values.items(), key=lambda item: item[1], reverse=True)[:top])
+    return {
+        "runs": len(runs),
+        "cold_start_ms": median(run["cold_start_ms"] for run in runs),
+        "process_ms": median(run["process_ms"] for run in runs),
+        "phases": median_of(runs, "phases"),
+        "packages": by_time(median_of(runs, "packages")),
+        "slowest_modules": by_time(median_of(runs, "modules")),
+        "slowest_app_modules": by_time(median_of(runs, "app_modules")),
+    }
+
+
+def print_report(report: dict):
+    print(f"Cold start {report['cold_start_ms']:.0f} ms (import app.main + lifespan startup), "
+          f"process {report['process_ms']:.0f} ms, median of {report['runs']} runs")
+    for title, key, note in (
+        ("Phases", "phases", ""),
+        ("Import time by package", "packages", "self time"),
+        ("Slowest modules", "slowest_modules", "self time"),
+        ("Slowest app modules", "slowest_app_modules", "including their imports"),
+    ):
+        print(f"\n{title}" + (f" ({note})" if note else ""))
+        for name, ms in report[key].items():
+            print(f"  {ms:>8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--budget-ms", type=float, nargs="?", const=COLD_START_BUDGET_MS,
+                        help=f"Fail when the cold start is over this many ms (default {COLD_START_BUDGET_MS})")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = summarize([profile_once() for _ in range(args.runs)], args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    if args.budget_ms is not None and report["cold_start_ms"] > args.budget_ms:
+        print(f"\nCold start {report['cold_start_ms']:.0f} ms is over the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
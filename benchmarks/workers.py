@@ -0,0 +1,122 @@
+"""Requests per second of the production server profile at several worker counts.
+
+    python -m benchmarks.workers [--workers 1,2,4,8] [--path /openapi.json] [--seconds 10]
+
+Starts gunicorn with gunicorn.conf.py for each worker count and drives it with keep-alive
+connections from separate client processes. The default path needs no database. Point
+--path at a listing such as /products/?limit=20 to include Postgres, with DATABASE_URL set."""
+from multiprocessing import Pool
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+
+async def _connection(host: str, port: int, request: bytes, deadline: float, latencies: list[float]):
+    while time.perf_counter() < deadline:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                status = int(head.split(b" ", 2)[1])
+                length = next(
+                    int(line.split(b":", 1)[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length:"))
+                await reader.readexactly(length)
+                if status >= 500:
+                    raise RuntimeError(f"Server answered {status}")
+                latencies.append(time.perf_counter() - started)
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            # A worker recycled after max_requests drops its connections, reconnect like a client would
+            pass
+        finally:
+            writer.close()
+
+
+def _client(args) -> list[float]:
+    host, port, path, connections, seconds = args
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode()
+    latencies: list[float] = []
+
+    async def run():
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(_connection(host, port, request, deadline, latencies) for _ in range(connections)))
+
+    asyncio.run(run())
+    return latencies
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = {**os.environ, "WEB_WORKERS": str(workers), "WEB_BIND": f"127.0.0.1:{port}"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited: {server.stderr.read().decode()[-2000:]}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=1).read()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not come up within 30s")
+
+
+def measure(workers: int, path: str, seconds: float, clients: int, connections: int) -> dict:
+    port = free_port()
+    server = start_server(workers, port)
+    try:
+        # Every worker has to be up before the clock starts, the first request of each warms its caches
+        _client(("127.0.0.1", port, path, workers * 2, 1.0))
+        started = time.perf_counter()
+        with Pool(clients) as pool:
+            results = pool.map(_client, [("127.0.0.1", port, path, connections, seconds)] * clients)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    latencies = sorted(latency for result in results for latency in result)
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma separated worker counts")
+    parser.add_argument("--path", default="/openapi.json")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=min(os.cpu_count() or 1, 4), help="Load generating processes")
+    parser.add_argument("--connections", type=int, default=16, help="Keep-alive connections per client process")
+    args = parser.parse_args()
+
+    print(f"{args.path}, {args.clients}x{args.connections} connections, {args.seconds:.0f}s per run, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'requests':>10} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    baseline = None
+    for workers in (int(count) for count in args.workers.split(",")):
+        result = measure(workers, args.path, args.seconds, args.clients, args.connections)
+        baseline = baseline or result["rps"]
+        print(f"{result['workers']:>8} {result['requests']:>10} {result['rps']:>10.0f} "
+              f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}   x{result['rps'] / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
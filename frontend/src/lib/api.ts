@@ -297,9 +297,10 @@ export const fetchUserOrders = async (): Promise<Order[]> => {
     }
 };
 
-export const deleteOrder = async (orderId: number): Promise<boolean> => {
+// createdAt lets the API read only the order's monthly partition
+export const deleteOrder = async (orderId: number, createdAt?: string): Promise<boolean> => {
     try {
-        await api.delete(`/orders/${orderId}`);
+        await api.delete(`/orders/${orderId}`, { params: createdAt ? { created_at: createdAt } : undefined });
         return true;
     } catch (error) {
         console.error('Failed to delete order:', error);
@@ -307,9 +308,11 @@ export const deleteOrder = async (orderId: number): Promise<boolean> => {
     }
 };
 
-export const updateOrderStatus = async (orderId: number, status: string): Promise<Order | null> => {
+export const updateOrderStatus = async (orderId: number, status: string, createdAt?: string): Promise<Order | null> => {
     try {
-        const response = await api.put<{ message: string; data: Order }>(`/orders/${orderId}/status?new_status=${status}`);
+        const response = await api.put<{ message: string; data: Order }>(`/orders/${orderId}/status`, null, {
+            params: { new_status: status, ...(createdAt ? { created_at: createdAt } : {}) },
+        });
         return response.data.data;
     } catch (error) {
         console.error('Failed to update order status:', error);
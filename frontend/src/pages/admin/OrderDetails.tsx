@@ -46,7 +46,7 @@ export default function OrderDetails() {
   };
 
   const handleStatusChange = async (orderId: number, status: string) => {
-    const updatedOrder = await updateOrderStatus(orderId, status);
+    const updatedOrder = await updateOrderStatus(orderId, status, orders.find(o => o.id === orderId)?.created_at);
     if (updatedOrder) {
       setOrders(orders.map(o => o.id === orderId ? updatedOrder : o));
       toast({
@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import { toast } from '@/hooks/use-toast';
 import api from '@/services/api';
+import { Button } from '@/components/ui/button';
 import { Star } from 'lucide-react';
 import { ProductCard } from '@/components/ProductCard';
 import { Toaster, toast as hotToast } from 'react-hot-toast';
@@ -32,8 +33,16 @@ interface Review {
   };
 }
 
+interface ReviewsPage {
+  message: string;
+  data: Review[];
+  next_cursor: string | null;
+}
+
 const ViewReviews = () => {
   const [reviews, setReviews] = useState<Review[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [topProducts, setTopProducts] = useState<Product[]>([]);
   const [loading, setLoading] = useState(true);
   const [updateValues, setUpdateValues] = useState<{ [productId: number]: { stock?: string; discount_percentage?: string } }>({});
@@ -41,8 +50,9 @@ const ViewReviews = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const reviewsResponse = await api.get<Review[]>('/reviews/');
-        setReviews(reviewsResponse.data);
+        const reviewsResponse = await api.get<ReviewsPage>('/reviews/');
+        setReviews(reviewsResponse.data.data);
+        setNextCursor(reviewsResponse.data.next_cursor);
 
         const productsResponse = await api.get<{message: string, data: Product[]}>('/products?limit=0');
         const products = productsResponse.data.data;
@@ -67,6 +77,21 @@ const ViewReviews = () => {
     fetchData();
   }, []);
 
+  // The feed is keyset paginated, each page continues after the last review of the previous one
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get<ReviewsPage>('/reviews/', { params: { cursor: nextCursor } });
+      setReviews(prev => [...prev, ...response.data.data]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      hotToast.error('Failed to load more reviews.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleUpdateValueChange = (productId: number, field: 'stock' | 'discount_percentage', value: string) => {
     setUpdateValues(prev => ({
       ...prev,
@@ -156,6 +181,13 @@ const ViewReviews = () => {
             ))}
           </tbody>
         </table>
+        {nextCursor && (
+          <div className="flex justify-center p-4">
+            <Button variant="outline" onClick={handleLoadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </div>
+        )}
       </div>
 
       <div>
@@ -73,7 +73,7 @@ export default function Orders() {
     if (orderToDelete === null) return;
 
     try {
-      await deleteOrder(orderToDelete);
+      await deleteOrder(orderToDelete, orders.find(order => order.id === orderToDelete)?.created_at);
       setOrders(orders.filter(order => order.id !== orderToDelete));
       toast({
         title: "Order deleted",
@@ -0,0 +1,74 @@
+"""Production server profile: gunicorn managing uvicorn workers.
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Every value can be set through the WEB_* settings (see the Server Config section of
+app/core/config.py), the ones left unset are derived from the CPUs this container may use."""
+import math
+import os
+from app.core.config import settings
+
+
+def available_cpus() -> int:
+    """CPUs the process may run on, capped by the cgroup quota a container limit sets."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as file:
+            quota, period = file.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+def somaxconn() -> int:
+    try:
+        with open("/proc/sys/net/core/somaxconn") as file:
+            return int(file.read())
+    except (OSError, ValueError):
+        return 4096
+
+
+cpus = available_cpus()
+
+bind = settings.web_bind
+worker_class = settings.web_worker_class
+# Request handlers are mostly sync and wait on Postgres in the threadpool, so more than one worker per CPU pays off
+workers = settings.web_workers or 2 * cpus + 1
+keepalive = settings.web_keepalive_seconds
+timeout = settings.web_timeout_seconds
+graceful_timeout = settings.web_timeout_seconds
+
+# Recycle workers to bound memory growth. The jitter widens with the worker count so they don't restart together.
+max_requests = settings.web_max_requests
+max_requests_jitter = (
+    settings.web_max_requests_jitter if settings.web_max_requests_jitter is not None
+    else max_requests * min(workers, 5) // 10
+)
+
+# Connections queued while every worker is busy, the kernel caps it at somaxconn anyway
+backlog = settings.web_backlog or min(512 * workers, somaxconn())
+
+# The app is imported once in the master, workers share its memory copy-on-write
+preload_app = True
+
+# Heartbeat files in memory, an overlay filesystem can stall the worker timeout checks
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = "-"
+
+
+def when_ready(server):
+    server.log.info("Serving with %d %s workers on %d CPUs (keepalive %ss, max_requests %d+%d, backlog %d)",
+                    workers, worker_class, cpus, keepalive, max_requests, max_requests_jitter, backlog)
+
+
+def post_fork(server, worker):
+    # Pooled connections opened in the master must not be shared by the workers.
+    # close=False leaves the master's sockets alone, each worker starts with an empty pool.
+    from app.db.database import dispose_engine
+    dispose_engine(close=False)